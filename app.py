@@ -531,6 +531,15 @@ def metrics():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _log_entry_ts(value):
+    """Epoch seconds for a JSONL "timestamp" field (epoch number or ISO string)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        from datetime import datetime as _dt
+        return _dt.fromisoformat(value).timestamp()
+    return None
+
 # --- Public, user-friendly Dashboard routes (no admin key required) ---
 @app.route("/dashboard")
 @app.route("/dashboard/<path:subpage>")
@@ -696,7 +705,7 @@ def dashboard_errors_api():
             except Exception:
                 pass
 
-        # Discovery errors from discovery_errors.jsonl (ISO timestamps)
+        # Discovery errors from discovery_errors.jsonl (epoch or legacy ISO timestamps)
         d_errors_path = os.path.join(data_dir, "discovery_errors.jsonl")
         if os.path.exists(d_errors_path):
             try:
@@ -708,7 +717,7 @@ def dashboard_errors_api():
                         entry = json.loads(line)
                         iso = entry.get("timestamp")
                         try:
-                            ts = _dt.fromisoformat(iso).timestamp() if isinstance(iso, str) else None
+                            ts = _log_entry_ts(iso)
                         except Exception:
                             ts = None
                         if ts and ts >= cutoff:
@@ -754,7 +763,7 @@ def dashboard_metrics_advanced_api():
                         entry = json.loads(line)
                         iso = entry.get("timestamp")
                         try:
-                            ts = _dt.fromisoformat(iso).timestamp() if isinstance(iso, str) else None
+                            ts = _log_entry_ts(iso)
                         except Exception:
                             ts = None
                         if ts and ts >= cutoff:
@@ -780,7 +789,7 @@ def dashboard_metrics_advanced_api():
                         entry = json.loads(line)
                         iso = entry.get("timestamp")
                         try:
-                            ts = _dt.fromisoformat(iso).timestamp() if isinstance(iso, str) else None
+                            ts = _log_entry_ts(iso)
                         except Exception:
                             ts = None
                         if not ts or ts < cutoff:
@@ -890,7 +899,7 @@ def dashboard_scans_api():
                         entry = json.loads(line)
                         iso = entry.get("timestamp")
                         try:
-                            ts = _dt.fromisoformat(iso).timestamp() if isinstance(iso, str) else None
+                            ts = _log_entry_ts(iso)
                         except Exception:
                             ts = None
                         if not ts or ts < cutoff:
@@ -917,7 +926,7 @@ def dashboard_scans_api():
                         entry = json.loads(line)
                         iso = entry.get("timestamp")
                         try:
-                            ts = _dt.fromisoformat(iso).timestamp() if isinstance(iso, str) else None
+                            ts = _log_entry_ts(iso)
                         except Exception:
                             ts = None
                         if not ts or ts < cutoff:
@@ -1410,7 +1419,7 @@ def server_status():
 def health_check_dependencies():
     """Deep health check for external dependencies."""
     import httpx
-    from openai import OpenAI
+    from llm_client import get_shared_openai_client
     
     dependencies = {
         "openai": {"status": "unknown", "latency_ms": None},
@@ -1430,7 +1439,8 @@ def health_check_dependencies():
                 dependencies["openai"] = {"status": "unhealthy", "error": "Invalid API key format"}
             else:
                 try:
-                    client = OpenAI(api_key=openai_key)
+                    # Shared client: also warms the pool the scans will use
+                    get_shared_openai_client(openai_key)
                     # Client created successfully, assume healthy (avoid costly API calls)
                     dependencies["openai"] = {
                         "status": "healthy", 
@@ -4,7 +4,6 @@ Check current scan activity and show backend status
 """
 import os
 import time
-import glob
 
 def check_activity():
     print("🔍 DISCOVERY MODE SCAN ACTIVITY CHECK")
@@ -38,18 +37,24 @@ def check_activity():
     
     # Check recent file activity
     print("\n📁 Recent file activity in /tmp:")
-    scan_files = glob.glob('/tmp/*discovery*') + glob.glob('/tmp/*scan*') + glob.glob('/tmp/.admin_key')
+    # Single directory scan; DirEntry.stat() reuses the data from the scan where possible
+    files_with_time = []
+    try:
+        with os.scandir('/tmp') as it:
+            for e in it:
+                name = e.name
+                if name == '.admin_key' or (not name.startswith('.') and ('discovery' in name or 'scan' in name)):
+                    try:
+                        if e.is_file(follow_symlinks=False):
+                            files_with_time.append((e.path, e.stat(follow_symlinks=False).st_mtime))
+                    except OSError:
+                        continue
+    except OSError:
+        pass
+    scan_files = [f for f, _ in files_with_time]
     
     if scan_files:
         # Sort by modification time
-        files_with_time = []
-        for f in scan_files:
-            try:
-                mod_time = os.path.getmtime(f)
-                files_with_time.append((f, mod_time))
-            except:
-                continue
-        
         files_with_time.sort(key=lambda x: x[1], reverse=True)
         
         print(f"Found {len(files_with_time)} scan-related files:")
@@ -7,17 +7,33 @@ Integrates Discovery Mode into existing scanner.py pipeline with minimal changes
 """
 
 import os
+import re
 import json
 import time
+import copy
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
 import hashlib
-import asyncio
+import functools
+import types
+import uuid
+import base64
+import traceback
 import concurrent.futures
 import threading
+from collections import OrderedDict
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 
 from discovery_prompts import DECONSTRUCTION_KEYS_PROMPTS, track_discovery_performance, PROMPT_VERSION
-from llm_client import LLMClient
+from llm_client import (
+    LLMClient, LLM_EXECUTOR, FALLBACK_EXECUTOR, CircuitBreaker,
+    get_shared_openai_client, resolve_openai_api_key, backoff_delay, is_transient_llm_error,
+    load_persisted_capability, save_persisted_capability, RATE_LIMITS,
+)
 from discovery_schemas import (
     SchemaValidator,
     PositioningThemesResult,
@@ -28,19 +44,322 @@ from discovery_schemas import (
     DiscoveryFeedback
 )
 
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None  # Optional; fall back to stdlib json
+
+# === Console logging ===
+# Records are handed to a queue and written by a listener thread, so analysis
+# workers never block on stdout. DISCOVERY_VERBOSE_ERRORS also enables DEBUG
+# (tracebacks).
+_log = logging.getLogger("discovery")
+_log.propagate = False
+if os.getenv("DISCOVERY_VERBOSE_ERRORS", "false").lower() == "true":
+    _log.setLevel(logging.DEBUG)
+else:
+    # Unknown names (e.g. "verbose") fall back to INFO rather than failing the import
+    _level = logging.getLevelName(os.getenv("DISCOVERY_LOG_LEVEL", "INFO").upper())
+    _log.setLevel(_level if isinstance(_level, int) else logging.INFO)
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+_log.addHandler(logging.handlers.QueueHandler(_log_queue))
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _stdout_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# === Input sanitization patterns ===
+_SCRIPT_RE = re.compile(r'<script[^>]*>.*?</script>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_BRAND_KEYWORDS = frozenset(['mission', 'vision', 'values', 'about', 'brand', 'company', 'we are', 'our'])
+# Whole lines containing any brand keyword (case-insensitive)
+_BRAND_LINE_RE = re.compile(
+    r'^[^\n]*(?:' + '|'.join(re.escape(k) for k in sorted(_BRAND_KEYWORDS)) + r')[^\n]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# === Log file locations (resolved once at import) ===
+def _init_persistent_data_dir() -> str:
+    """Ensure PERSISTENT_DATA_DIR is set (app.py normally sets it first) and exists."""
+    data_dir = os.getenv("PERSISTENT_DATA_DIR")
+    if not data_dir:
+        data_dir = "/tmp/discovery_mode_data"
+        os.environ["PERSISTENT_DATA_DIR"] = data_dir
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
+
+_LOG_DIR = _init_persistent_data_dir()
+_RESULT_LOG = os.path.join(_LOG_DIR, "discovery_analysis.jsonl")
+_ERROR_LOG = os.path.join(_LOG_DIR, "discovery_errors.jsonl")
+_DEBUG_LOG = os.path.join(_LOG_DIR, "discovery_debug.jsonl")
+_FEEDBACK_LOG = os.path.join(_LOG_DIR, "discovery_feedback.jsonl")
+_METRICS_LOG = os.path.join(_LOG_DIR, "discovery_metrics.jsonl")
+_SEMANTIC_CACHE_LOG = os.path.join(_LOG_DIR, "alignment_semantic_cache.jsonl")
+_CACHE_ROOT = os.path.join(_LOG_DIR, "discovery_cache")
+os.makedirs(_CACHE_ROOT, exist_ok=True)
+
+@functools.lru_cache(maxsize=32)
+def _key_cache_dir(cache_root: str, key_name: str) -> str:
+    """Per-key cache directory, created on first use (not on every lookup)."""
+    d = os.path.join(cache_root, key_name)
+    os.makedirs(d, exist_ok=True)
+    return d
+
+# === Buffered JSONL log writers ===
+# One long-lived append handle per log file instead of open/write/close per event.
+# A daemon timer flushes (and fsyncs) buffers periodically; everything is flushed at exit.
+_LOG_WRITERS: Dict[str, Any] = {}
+_LOG_WRITERS_LOCK = threading.Lock()
+_LOG_FLUSH_INTERVAL = float(os.getenv("DISCOVERY_LOG_FLUSH_SECONDS", "2"))
+_log_flush_timer = None
+
+def _get_writer(path: str):
+    """Return a buffered append handle for path. Caller must hold _LOG_WRITERS_LOCK."""
+    w = _LOG_WRITERS.get(path)
+    if w is None:
+        w = open(path, "ab", buffering=1 << 16)
+        _LOG_WRITERS[path] = w
+        _schedule_log_flush()
+    return w
+
+def _rewrite_jsonl(path: str, entries: List[dict]) -> None:
+    """Atomically replace path with entries (compaction); the open append handle is reopened lazily."""
+    tmp = f"{path}.tmp"
+    with _LOG_WRITERS_LOCK:
+        w = _LOG_WRITERS.pop(path, None)
+        if w is not None:
+            try:
+                w.close()
+            except Exception:
+                pass
+        with open(tmp, "wb") as f:
+            for entry in entries:
+                f.write(_dumps_line(entry))
+        os.replace(tmp, path)
+
+def _json_dumps_bytes(obj: Any) -> bytes:
+    return orjson.dumps(obj) if orjson is not None else json.dumps(obj).encode()
+
+def _json_loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def _dumps_line(entry: dict, default=None) -> bytes:
+    """Serialize entry as a single newline-terminated JSON line (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(entry, default=default, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+    return (json.dumps(entry, default=default) + "\n").encode()
+
+def _append_jsonl(path: str, entry: dict, default=None) -> None:
+    """Append one JSON line to path through the shared buffered writer."""
+    line = _dumps_line(entry, default=default)
+    with _LOG_WRITERS_LOCK:
+        _get_writer(path).write(line)
+
+def _flush_log_writers(fsync: bool = True) -> None:
+    with _LOG_WRITERS_LOCK:
+        for w in list(_LOG_WRITERS.values()):
+            try:
+                w.flush()
+                if fsync:
+                    os.fsync(w.fileno())
+            except Exception:
+                pass
+
+def _schedule_log_flush() -> None:
+    global _log_flush_timer
+    if _log_flush_timer is not None:
+        return
+    def _tick():
+        global _log_flush_timer
+        _flush_log_writers()
+        _log_flush_timer = None
+        with _LOG_WRITERS_LOCK:
+            _schedule_log_flush()
+    _log_flush_timer = threading.Timer(_LOG_FLUSH_INTERVAL, _tick)
+    _log_flush_timer.daemon = True
+    _log_flush_timer.start()
+
+@atexit.register
+def _close_log_writers() -> None:
+    _flush_log_writers()
+    with _LOG_WRITERS_LOCK:
+        for w in _LOG_WRITERS.values():
+            try:
+                w.close()
+            except Exception:
+                pass
+        _LOG_WRITERS.clear()
+
+@functools.lru_cache(maxsize=32)
+def _prompt_hash(key_name: str) -> str:
+    """Short, stable hash of a key's prompt template (prompts are static per process)."""
+    return hashlib.sha256(DECONSTRUCTION_KEYS_PROMPTS[key_name]["prompt"].encode()).hexdigest()[:8]
+
+# === Result schemas (generated once; pydantic schema generation walks the model graph) ===
+def _model_json_schema(schema_class) -> dict:
+    try:
+        return schema_class.model_json_schema()
+    except AttributeError:
+        return schema_class.schema()  # pydantic v1
+
+def _strict_response_format(name: str, schema: dict) -> dict:
+    return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": True}}
+
+_POSITIONING_SCHEMA = _model_json_schema(PositioningThemesResult)
+_KEY_MESSAGES_SCHEMA = _model_json_schema(KeyMessagesResult)
+_TONE_SCHEMA = _model_json_schema(ToneOfVoiceResult)
+_POSITIONING_RESPONSE_FORMAT = _strict_response_format("positioning_themes", _POSITIONING_SCHEMA)
+_KEY_MESSAGES_RESPONSE_FORMAT = _strict_response_format("KeyMessagesResult", _KEY_MESSAGES_SCHEMA)
+_TONE_RESPONSE_FORMAT = _strict_response_format("ToneOfVoiceResult", _TONE_SCHEMA)
+
+def _dump_result(model) -> dict:
+    """JSON-ready dict of a validated result model (pydantic v2 model_dump, v1 .dict())."""
+    if hasattr(model, "model_dump"):
+        return model.model_dump(mode="json")
+    return model.dict()
+
+# Output caps per call: these are short structured outputs, so an unbounded generation
+# only adds latency variance. gpt-5 counts reasoning tokens against its cap, hence headroom.
+_MAX_OUTPUT_TOKENS = {
+    "key_messages": 1200,
+    "tone_of_voice": 900,
+    "text_keys_combined": 3000,
+    "brand_elements": 1500,
+    "brand_elements_gpt5": 4000,
+    "visual_text_alignment": 600,
+    "visual_text_alignment_gpt5": 1500,
+    "positioning_themes_fallback": 1000,
+}
+
+# Token caps on prompt content (head + tail kept), per key and overridable with
+# DISCOVERY_MAX_PROMPT_TOKENS_<KEY>. Positioning's cap matches its 15000-char budget,
+# so it only bites on unusually dense tokenization; the combined call has no char budget.
+_MAX_PROMPT_TOKENS = {
+    "positioning_themes": 15000,
+    "text_keys_combined": 6000,
+}
+
+def _max_prompt_tokens(key_name: str) -> int:
+    return int(os.getenv(f"DISCOVERY_MAX_PROMPT_TOKENS_{key_name.upper()}", _MAX_PROMPT_TOKENS[key_name]))
+
+_HASH_CHUNK_CHARS = 64 * 1024
+
+# Every cache/dedup key uses one scheme: SHA-256 (OpenSSL uses the CPU's SHA extensions,
+# measured faster than blake2b here) truncated to 128 bits of hex.
+_KEY_HEX_CHARS = 32
+
+def _key_digest(m) -> str:
+    """Cache key from a SHA-256 hasher: its first 128 bits as hex."""
+    return m.hexdigest()[:_KEY_HEX_CHARS]
+
+def _content_digest(text: str) -> str:
+    """128-bit hex digest of analysis input (cache/dedup keys, not security)."""
+    return _key_digest(hashlib.sha256((text or "").encode("utf-8", "replace")))
+
+def _image_mime(head: bytes) -> Optional[str]:
+    """MIME type from an image's leading magic bytes, or None if unrecognized."""
+    if head[:3] == b'\xff\xd8\xff':
+        return "image/jpeg"
+    if head[:8] == b'\x89PNG\r\n\x1a\n':
+        return "image/png"
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return "image/webp"
+    return None
+
+@functools.lru_cache(maxsize=32)
+def _fingerprint_salt(key_name: str, schema_class) -> bytes:
+    """Digest of everything but the content that a cached result depends on."""
+    try:
+        schema_dict = _model_json_schema(schema_class)
+    except Exception:
+        schema_dict = {}
+    m = hashlib.sha256()
+    m.update(DECONSTRUCTION_KEYS_PROMPTS[key_name]["prompt"].encode())
+    m.update(json.dumps(schema_dict, sort_keys=True).encode())
+    m.update(PROMPT_VERSION.encode())
+    return m.digest()
+
+@functools.lru_cache(maxsize=32)
+def _fingerprint_state(key_name: str, schema_class):
+    """SHA-256 state already seeded with the key's salt; callers hash content into a copy()."""
+    m = hashlib.sha256()
+    m.update(_fingerprint_salt(key_name, schema_class))
+    return m
+
+def _iter_until(stream, deadline: Optional[float]):
+    """Yield stream events until the time.monotonic() deadline passes, then close the stream.
+
+    The caller stops waiting at its timeout, but a stream that keeps sending deltas
+    would otherwise hold its worker until the model finishes.
+    """
+    try:
+        for event in stream:
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("Stream drain abandoned at its deadline")
+            yield event
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+def _drain_chat_stream(client, deadline: Optional[float] = None, **kwargs):
+    """
+    Run a streaming Chat Completions call to completion and return a response-shaped object.
+
+    Deltas are accumulated as they arrive so parsing can begin as soon as the stream
+    ends, and usage is taken from the final chunk (stream_options.include_usage).
+    """
+    kwargs.setdefault("stream_options", {"include_usage": True})
+    parts: List[str] = []
+    usage = None
+    model = kwargs.get("model")
+    for chunk in _iter_until(client.chat.completions.create(**kwargs), deadline):
+        model = getattr(chunk, "model", None) or model
+        if getattr(chunk, "usage", None) is not None:
+            usage = chunk.usage
+        if chunk.choices:
+            delta = getattr(chunk.choices[0].delta, "content", None)
+            if delta:
+                parts.append(delta)
+    message = types.SimpleNamespace(content="".join(parts), parsed=None)
+    return types.SimpleNamespace(
+        choices=[types.SimpleNamespace(message=message)],
+        usage=usage,
+        model=model,
+    )
+
+def _drain_responses_stream(client, deadline: Optional[float] = None, **kwargs):
+    """
+    Run a streaming Responses call to completion and return a response-shaped object.
+
+    output_text is assembled from response.output_text.delta events, so no walk over
+    the output/reasoning item tree is needed; usage and model come from response.completed.
+    """
+    kwargs["stream"] = True
+    parts: List[str] = []
+    final = None
+    for event in _iter_until(client.responses.create(**kwargs), deadline):
+        event_type = getattr(event, "type", "")
+        if event_type == "response.output_text.delta":
+            parts.append(event.delta)
+        elif event_type == "response.completed":
+            final = event.response
+        elif event_type in ("response.failed", "error"):
+            raise Exception(f"Responses stream failed: {getattr(event, 'error', None) or getattr(getattr(event, 'response', None), 'error', None)}")
+    return types.SimpleNamespace(
+        output_text="".join(parts),
+        usage=getattr(final, "usage", None),
+        model=getattr(final, "model", None) or kwargs.get("model"),
+    )
+
 def safe_openai_call(client, timeout_seconds=120, max_retries=2, **kwargs):
     """
     Thread-safe wrapper for OpenAI API calls with timeout protection and retries.
     Uses concurrent.futures instead of signals for thread safety.
+    With stream=True the stream is drained inside the timeout window and a
+    non-streaming response shape is returned.
     """
-    import concurrent.futures
-    import time as time_module
-    
-    # Ensure PERSISTENT_DATA_DIR is set for Discovery Mode logging
-    if not os.getenv("PERSISTENT_DATA_DIR"):
-        temp_data_dir = "/tmp/discovery_mode_data"
-        os.makedirs(temp_data_dir, exist_ok=True)
-        os.environ["PERSISTENT_DATA_DIR"] = temp_data_dir
     
     # Add timeout parameter to the API call if not already set
     if 'timeout' not in kwargs:
@@ -49,25 +368,32 @@ def safe_openai_call(client, timeout_seconds=120, max_retries=2, **kwargs):
     last_error = None
     for retry in range(max_retries + 1):
         if retry > 0:
-            wait_time = 2 ** retry  # Exponential backoff: 2, 4, 8 seconds
-            print(f"[INFO] Retry {retry}/{max_retries} after {wait_time}s delay...")
-            time_module.sleep(wait_time)
+            wait_time = backoff_delay(retry, last_error)  # Jittered ~2, 4, 8s; honours Retry-After
+            _log.info(f"Retry {retry}/{max_retries} after {wait_time:.1f}s delay...")
+            time.sleep(wait_time)
         
-        # Use ThreadPoolExecutor for thread-safe timeout
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(client.chat.completions.create, **kwargs)
-            try:
-                response = future.result(timeout=timeout_seconds)
-                return response
-            except concurrent.futures.TimeoutError:
-                # Try to cancel the future
-                future.cancel()
-                last_error = TimeoutError(f"OpenAI API call timed out after {timeout_seconds} seconds (attempt {retry + 1}/{max_retries + 1})")
-                if retry == max_retries:
-                    raise last_error
-            except Exception as e:
-                # For other exceptions, don't retry
+        # Pause first if the last response reported nearly exhausted rate-limit headroom
+        RATE_LIMITS.wait_if_throttled()
+        # Chat pool, kept apart from the Responses pool (no per-call thread spin-up)
+        if kwargs.get("stream"):
+            future = FALLBACK_EXECUTOR.submit(_drain_chat_stream, client,
+                                              deadline=time.monotonic() + timeout_seconds, **kwargs)
+        else:
+            future = FALLBACK_EXECUTOR.submit(client.chat.completions.create, **kwargs)
+        try:
+            response = future.result(timeout=timeout_seconds)
+            return response
+        except concurrent.futures.TimeoutError:
+            # Stop waiting; the SDK timeout bounds the background call
+            future.cancel()
+            last_error = TimeoutError(f"OpenAI API call timed out after {timeout_seconds} seconds (attempt {retry + 1}/{max_retries + 1})")
+            if retry == max_retries:
+                raise last_error
+        except Exception as e:
+            # Retry only transient failures (429, 5xx, dropped connections)
+            if retry == max_retries or not is_transient_llm_error(e):
                 raise e
+            last_error = e
     
     # Should not reach here, but just in case
     raise last_error if last_error else Exception("Unexpected error in safe_openai_call")
@@ -75,83 +401,150 @@ def safe_openai_call(client, timeout_seconds=120, max_retries=2, **kwargs):
 def safe_responses_call(client, timeout_seconds: int = 60, max_retries: int = 0, **kwargs):
     """
     Thread-safe wrapper for OpenAI Responses API calls with timeout and optional retries.
-    Avoids passing SDK-specific timeout kwargs; enforces timeout externally.
+    The SDK timeout is set to timeout_seconds as well, so a call abandoned at the
+    deadline frees its LLM_EXECUTOR worker instead of running to the client default.
+    With stream=True the event stream is drained inside the timeout window and an
+    object exposing output_text/usage/model is returned.
     """
-    import concurrent.futures
-    import time as time_module
 
+    kwargs.setdefault("timeout", timeout_seconds)
     last_error = None
     for retry in range(max_retries + 1):
         if retry > 0:
-            wait_time = min(2 ** retry, 8)
-            print(f"[INFO] Responses retry {retry}/{max_retries} after {wait_time}s delay...")
-            time_module.sleep(wait_time)
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(client.responses.create, **kwargs)
-            try:
-                return future.result(timeout=timeout_seconds)
-            except concurrent.futures.TimeoutError:
-                future.cancel()
-                last_error = TimeoutError(f"Responses API call timed out after {timeout_seconds}s (attempt {retry + 1}/{max_retries + 1})")
-                if retry == max_retries:
-                    raise last_error
-            except Exception as e:
-                # Bubble up other errors immediately
+            wait_time = backoff_delay(retry, last_error, cap=8)
+            _log.info(f"Responses retry {retry}/{max_retries} after {wait_time:.1f}s delay...")
+            time.sleep(wait_time)
+        RATE_LIMITS.wait_if_throttled()
+        if kwargs.get("stream"):
+            future = LLM_EXECUTOR.submit(_drain_responses_stream, client,
+                                         deadline=time.monotonic() + timeout_seconds, **kwargs)
+        else:
+            future = LLM_EXECUTOR.submit(client.responses.create, **kwargs)
+        try:
+            return future.result(timeout=timeout_seconds)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            last_error = TimeoutError(f"Responses API call timed out after {timeout_seconds}s (attempt {retry + 1}/{max_retries + 1})")
+            if retry == max_retries:
+                raise last_error
+        except Exception as e:
+            # Bubble up non-transient errors immediately
+            if retry == max_retries or not is_transient_llm_error(e):
                 raise e
+            last_error = e
     raise last_error if last_error else Exception("Unexpected error in safe_responses_call")
 
 # === Feature Flag System ===
+def _env_flag(name: str, default: str = 'false') -> bool:
+    return os.getenv(name, default).lower() == 'true'
+
+def _load_flags() -> types.SimpleNamespace:
+    """Parse feature-flag env vars once into an immutable-by-convention snapshot."""
+    return types.SimpleNamespace(
+        # Global kill switch: Discovery stays available unless DISCOVERY_MODE_ENABLED=false
+        discovery_mode=_env_flag('DISCOVERY_MODE_ENABLED', 'true'),
+        visual_analysis=_env_flag('DISCOVERY_VISUAL_ANALYSIS'),
+        export_features=_env_flag('DISCOVERY_EXPORT_ENABLED'),
+        advanced_feedback=_env_flag('DISCOVERY_ADVANCED_FEEDBACK'),
+        force_chat_completions=_env_flag('DISCOVERY_FORCE_CHAT_COMPLETIONS'),
+        sequential_mode=_env_flag('DISCOVERY_SEQUENTIAL_MODE'),
+        # Opt-in: one call for the three text keys instead of the versioned per-key prompts
+        combined_text_call=_env_flag('DISCOVERY_COMBINED_TEXT_CALL'),
+        verbose_errors=_env_flag('DISCOVERY_VERBOSE_ERRORS'),
+        # Opt-in: near-duplicate reuse of visual_text_alignment results via embeddings
+        semantic_cache=_env_flag('DISCOVERY_SEMANTIC_CACHE'),
+    )
+
+_FLAGS = _load_flags()
+
+def refresh_flags() -> None:
+    """Re-read feature-flag env vars (for tests or a config reload)."""
+    global _FLAGS
+    _FLAGS = _load_flags()
+
 class FeatureFlags:
-    """Simplified flags. Discovery is always available; UI toggle controls mode."""
+    """Simplified flags. Discovery is on unless DISCOVERY_MODE_ENABLED=false; UI toggle controls mode."""
     
     @staticmethod
     def is_discovery_enabled(user_id: Optional[str] = None) -> bool:
-        # Always enabled; rely on UI toggle to select mode
-        return True
+        # Global switch only; when on, the UI toggle selects the mode per scan
+        return _FLAGS.discovery_mode
     
     @staticmethod
     def get_enabled_features() -> Dict[str, bool]:
+        flags = _FLAGS
         return {
-            "discovery_mode": True,
-            "visual_analysis": os.getenv('DISCOVERY_VISUAL_ANALYSIS', 'false').lower() == 'true',
-            "export_features": os.getenv('DISCOVERY_EXPORT_ENABLED', 'false').lower() == 'true',
-            "advanced_feedback": os.getenv('DISCOVERY_ADVANCED_FEEDBACK', 'false').lower() == 'true'
+            "discovery_mode": flags.discovery_mode,
+            "visual_analysis": flags.visual_analysis,
+            "export_features": flags.export_features,
+            "advanced_feedback": flags.advanced_feedback
         }
 
 # === Runtime Capability Probe & Routing ===
 RESPONSES_CAPABLE = None  # type: Optional[bool]
 
+def _error_summary(e: BaseException) -> str:
+    """Full traceback with DISCOVERY_VERBOSE_ERRORS=true, else a cheap one-line 'Type: message'."""
+    if _FLAGS.verbose_errors:
+        return traceback.format_exc()
+    return f"{type(e).__name__}: {e}"
+
+# Error-message keywords -> metrics["error"], in priority order (earlier wins)
+_ERROR_KEYWORDS = (
+    ("rate limit", "rate_limit"),
+    ("insufficient_quota", "quota_exceeded"),
+    ("json", "json_parse_error"),
+    ("parsing", "json_parse_error"),
+    ("timeout", "timeout"),
+)
+_ERROR_KEYWORD_RE = re.compile("|".join(re.escape(k) for k, _ in _ERROR_KEYWORDS), re.IGNORECASE)
+_ERROR_PRIORITY = {k: (i, t) for i, (k, t) in enumerate(_ERROR_KEYWORDS)}
+
+def _classify_error(e: BaseException) -> str:
+    """Coarse error type from the exception message, scanned once."""
+    hits = {m.lower() for m in _ERROR_KEYWORD_RE.findall(str(e))}
+    return min((_ERROR_PRIORITY[h] for h in hits), default=(0, "unknown_error"))[1]
+
 def _force_chat_completions() -> bool:
-    return os.getenv('DISCOVERY_FORCE_CHAT_COMPLETIONS', 'false').lower() == 'true'
+    return _FLAGS.force_chat_completions
 
 def probe_responses_capability() -> bool:
     """Attempt a tiny Responses call to determine availability for this process."""
     try:
         if _force_chat_completions():
             return False
-        from openai import OpenAI
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            try:
-                from dotenv import load_dotenv
-                load_dotenv()
-                api_key = os.getenv("OPENAI_API_KEY")
-            except ImportError:
-                pass
+        api_key = resolve_openai_api_key()
         if not api_key:
             return False
-        client = OpenAI(api_key=api_key)
+        client = get_shared_openai_client(api_key)
         # Minimal Responses call via safe wrapper with short timeout
         _ = safe_responses_call(client, timeout_seconds=8, model="gpt-5", input="ping", reasoning={"effort": "minimal"}, text={"verbosity": "low"})
         return True
     except Exception:
         return False
 
+_PROBE_LOCK = threading.Lock()
+
 def ensure_responses_capability_probe() -> None:
     global RESPONSES_CAPABLE
-    if RESPONSES_CAPABLE is None:
-        RESPONSES_CAPABLE = probe_responses_capability()
-        print(f"[INFO] Responses capability: {'enabled' if RESPONSES_CAPABLE else 'disabled'}")
+    if RESPONSES_CAPABLE is not None:
+        return
+    # Concurrent first analyses wait for one probe instead of each paying for a gpt-5 call
+    with _PROBE_LOCK:
+        if RESPONSES_CAPABLE is not None:
+            return
+        api_key = None if _force_chat_completions() else resolve_openai_api_key()
+        cached = load_persisted_capability(api_key) if api_key else None
+        if cached is not None:
+            capable = cached
+            source = "cached"
+        else:
+            capable = probe_responses_capability()
+            source = "probed"
+            if api_key:
+                save_persisted_capability(api_key, capable)
+        RESPONSES_CAPABLE = capable
+        _log.info(f"Responses capability: {'enabled' if RESPONSES_CAPABLE else 'disabled'} ({source})")
 
 def _should_use_responses() -> bool:
     if _force_chat_completions():
@@ -159,6 +552,109 @@ def _should_use_responses() -> bool:
     ensure_responses_capability_probe()
     return bool(RESPONSES_CAPABLE)
 
+def _responses_available(key_name: str) -> bool:
+    """Read-only: capability (memoized) is on and neither the shared GPT-5 nor the key breaker is open."""
+    return (_should_use_responses() and not CircuitBreaker.is_open(CircuitBreaker.GPT5)
+            and not CircuitBreaker.is_open(key_name))
+
+def _claim_responses(key_name: str) -> bool:
+    """Take the breakers' half-open probe slots; call only once the gpt-5 request is certain to be sent."""
+    return CircuitBreaker.allow_all(CircuitBreaker.GPT5, key_name)
+
+def _record_responses_result(key_name: str, success: bool) -> None:
+    CircuitBreaker.record_result(key_name, success=success)
+    CircuitBreaker.record_result(CircuitBreaker.GPT5, success=success)
+
+# Shared pool for running the per-key analyses of a scan side by side. Kept separate
+# from LLM_EXECUTOR because each analysis itself blocks on an LLM_EXECUTOR future.
+_ANALYSIS_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.getenv("DISCOVERY_ANALYSIS_POOL", "6")),
+    thread_name_prefix="discovery",
+)
+
+# Vision (brand elements) runs alongside a scan's text keys; its own small pool keeps
+# it from taking one of the text analyses' slots in _ANALYSIS_EXECUTOR.
+_VISION_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.getenv("DISCOVERY_VISION_POOL", "2")),
+    thread_name_prefix="discovery-vision",
+)
+
+def _as_completed_gated(tasks, limit: int = 2, timeout: Optional[float] = None):
+    """Run (key, fn) tasks on _ANALYSIS_EXECUTOR, at most `limit` at a time; yield (key, future) as each finishes.
+
+    Later tasks are submitted only when a slot frees up, so a task waiting for its turn
+    does not hold a pool worker. On timeout the running futures are cancelled and
+    concurrent.futures.TimeoutError is raised; tasks not yet submitted never start.
+    """
+    pending = list(tasks)
+    running: Dict[concurrent.futures.Future, str] = {}
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    def _fill():
+        while pending and len(running) < limit:
+            key, fn = pending.pop(0)
+            running[_ANALYSIS_EXECUTOR.submit(fn)] = key
+
+    _fill()
+    while running:
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        done, _ = concurrent.futures.wait(running, timeout=remaining,
+                                          return_when=concurrent.futures.FIRST_COMPLETED)
+        if not done:
+            for future in running:
+                future.cancel()
+            raise concurrent.futures.TimeoutError(f"Analyses still running after {timeout}s")
+        finished = [(running.pop(future), future) for future in done]
+        _fill()  # Refill before handing results back, so slow consumers do not idle the slot
+        yield from finished
+
+# Single writer for Redis/disk cache persistence, so results return without waiting
+# on that I/O. One worker keeps writes for the same key ordered.
+_CACHE_WRITER = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="discovery-cache")
+
+# === In-flight request coalescing ===
+# Identical analyses running at the same time (e.g. two scans of the same site) share
+# one LLM call: the first caller computes, later callers wait on its future.
+_INFLIGHT: Dict[Tuple[str, str, bool], concurrent.futures.Future] = {}
+_INFLIGHT_LOCK = threading.Lock()
+_INFLIGHT_WAIT_SECONDS = 300
+
+def _singleflight(key: Tuple[str, str, bool], compute):
+    with _INFLIGHT_LOCK:
+        future = _INFLIGHT.get(key)
+        leader = future is None
+        if leader:
+            future = concurrent.futures.Future()
+            _INFLIGHT[key] = future
+    if not leader:
+        result, metrics = future.result(timeout=_INFLIGHT_WAIT_SECONDS)
+        return copy.deepcopy(result), dict(metrics, coalesced=True)
+    try:
+        value = compute()
+        future.set_result(value)
+        return value
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(key, None)
+
+def _coalesce_inflight(key_name: str):
+    """Decorator for per-key text analyses: coalesce concurrent calls on identical input.
+
+    Callers that already hashed the input may pass content_digest to skip re-hashing.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, text_content: str, presanitized: bool = False, content_digest: Optional[str] = None):
+            digest = content_digest or _content_digest(text_content)
+            return _singleflight((key_name, digest, presanitized),
+                                 lambda: func(self, text_content, presanitized=presanitized,
+                                              content_digest=digest))
+        return wrapper
+    return decorator
+
 # === Discovery Mode Scanner Integration ===
 class DiscoveryAnalyzer:
     """Handles Discovery Mode analysis using existing scanner infrastructure."""
@@ -170,26 +666,54 @@ class DiscoveryAnalyzer:
         self.performance_metrics = {}
         # Unified LLM client abstraction (capability probe + circuit breaker + fallbacks)
         self.llm_client = LLMClient()
-        # Initialize cache directory for per-key result persistence
-        base_dir = os.getenv("PERSISTENT_DATA_DIR", "/tmp")
-        self.cache_root = os.path.join(base_dir, "discovery_cache")
-        os.makedirs(self.cache_root, exist_ok=True)
-        # Optional Redis cache
-        self.redis = None
-        redis_url = os.getenv("REDIS_URL")
-        if redis_url:
-            try:
-                import redis  # type: ignore
-                self.redis = redis.from_url(redis_url, decode_responses=True)
-            except Exception:
-                self.redis = None
+        # Per-key result persistence (directory resolved and created once at import)
+        self.cache_root = _CACHE_ROOT
+        # Optional Redis cache (one pooled client per process)
+        self.redis = type(self)._get_redis()
+
+    # === Shared Redis client ===
+    _redis_client = None
+    _redis_initialized = False
+    _redis_init_lock = threading.Lock()
+
+    @classmethod
+    def _get_redis(cls):
+        if cls._redis_initialized:
+            return cls._redis_client
+        with cls._redis_init_lock:
+            if not cls._redis_initialized:
+                redis_url = os.getenv("REDIS_URL")
+                if redis_url:
+                    try:
+                        import redis  # type: ignore
+                        # Bounded and blocking: concurrent scans wait briefly for a connection
+                        # instead of opening (and authenticating) one pool each.
+                        pool = redis.BlockingConnectionPool.from_url(
+                            redis_url,
+                            max_connections=int(os.getenv("DISCOVERY_REDIS_MAX_CONN", "32")),
+                            timeout=5,
+                        )
+                        cls._redis_client = redis.Redis(connection_pool=pool)  # Raw bytes: cache values go straight to orjson
+                    except Exception:
+                        cls._redis_client = None
+                cls._redis_initialized = True
+        return cls._redis_client
 
     # === Simple token-aware scheduler ===
-    _llm_semaphore = threading.Semaphore(int(os.getenv("DISCOVERY_LLM_CONCURRENCY", "2")))
+    # Concurrency limit is AIMD-controlled: +1 slot per success within the latency target,
+    # halved (and held for a cooldown) on rate-limit/5xx/timeout errors.
+    _concurrency_cv = threading.Condition()
+    _concurrency_limit = float(os.getenv("DISCOVERY_LLM_CONCURRENCY", "2"))
+    _concurrency_min = 1
+    _concurrency_max = int(os.getenv("DISCOVERY_LLM_CONCURRENCY_MAX", "8"))
+    _concurrency_cooldown = 30.0
+    _latency_target_s = float(os.getenv("DISCOVERY_LLM_LATENCY_TARGET_MS", "30000")) / 1000.0
+    _in_flight = 0
+    _no_growth_until = 0.0
     _tpm_limit = int(os.getenv("DISCOVERY_TPM_LIMIT", "80000"))  # rough tokens per minute
     _bucket_tokens = _tpm_limit
-    _bucket_ts = time.time()
-    _bucket_lock = threading.Lock()
+    _bucket_ts = time.monotonic()
+    _bucket_cv = threading.Condition()  # RLock-backed; guards bucket state and paces waiters
 
     @staticmethod
     def _estimate_tokens(text: str) -> int:
@@ -200,39 +724,64 @@ class DiscoveryAnalyzer:
 
     @classmethod
     def _refill_bucket(cls):
-        now = time.time()
-        with cls._bucket_lock:
+        now = time.monotonic()
+        with cls._bucket_cv:
             elapsed = now - cls._bucket_ts
             refill = int((elapsed / 60.0) * cls._tpm_limit)
             if refill > 0:
                 cls._bucket_tokens = min(cls._tpm_limit, cls._bucket_tokens + refill)
                 cls._bucket_ts = now
 
+    @classmethod
+    def _acquire_slot(cls, wait_timeout: float) -> bool:
+        deadline = time.monotonic() + wait_timeout
+        with cls._concurrency_cv:
+            while cls._in_flight >= int(cls._concurrency_limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                cls._concurrency_cv.wait(timeout=remaining)
+            cls._in_flight += 1
+            return True
+
     @classmethod
     def _acquire_budget(cls, tokens_needed: int, wait_timeout: float = 30.0) -> bool:
-        # Concurrency gate
-        got_sem = cls._llm_semaphore.acquire(timeout=wait_timeout)
-        if not got_sem:
+        # Concurrency gate (waits for a slot rather than failing over to a fallback model)
+        if not cls._acquire_slot(wait_timeout):
             return False
-        # Token bucket gate
-        deadline = time.time() + wait_timeout
-        while time.time() < deadline:
-            cls._refill_bucket()
-            with cls._bucket_lock:
+        # Token bucket gate: sleep exactly until the deficit should have refilled. A request
+        # larger than the whole bucket could never be satisfied, so it waits for a full one.
+        tokens_needed = min(tokens_needed, cls._tpm_limit)
+        deadline = time.monotonic() + wait_timeout
+        with cls._bucket_cv:
+            while True:
+                cls._refill_bucket()
                 if cls._bucket_tokens >= tokens_needed:
                     cls._bucket_tokens -= tokens_needed
                     return True
-            time.sleep(0.1)
-        # Failed to get tokens in time; release semaphore and fail
-        cls._llm_semaphore.release()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                deficit = tokens_needed - cls._bucket_tokens
+                cls._bucket_cv.wait(timeout=min(remaining, max(0.01, deficit * 60.0 / cls._tpm_limit)))
+        # Failed to get tokens in time; release the slot and fail
+        cls._release_budget()
         return False
 
     @classmethod
-    def _release_budget(cls):
-        try:
-            cls._llm_semaphore.release()
-        except Exception:
-            pass
+    def _release_budget(cls, latency_s: Optional[float] = None, error: Optional[BaseException] = None):
+        """Free a concurrency slot; with an outcome, adapt the limit (AIMD)."""
+        with cls._concurrency_cv:
+            if cls._in_flight > 0:
+                cls._in_flight -= 1
+            now = time.monotonic()
+            if error is not None:
+                if is_transient_llm_error(error):
+                    cls._concurrency_limit = max(cls._concurrency_min, cls._concurrency_limit * 0.5)
+                    cls._no_growth_until = now + cls._concurrency_cooldown
+            elif latency_s is not None and latency_s <= cls._latency_target_s and now >= cls._no_growth_until:
+                cls._concurrency_limit = min(cls._concurrency_max, cls._concurrency_limit + 1)
+            cls._concurrency_cv.notify_all()
 
     @staticmethod
     def _adaptive_timeout(input_tokens: int, cap: int = 90) -> int:
@@ -261,36 +810,37 @@ class DiscoveryAnalyzer:
                 # start new chunk; include overlap from previous chunk tail
                 overlap_text = "\n".join(current)[-overlap_tokens*4:] if current else ""
                 current = [overlap_text, para] if overlap_text else [para]
-                current_tokens = LLMClient.estimate_tokens("\n".join(current), model=model)
+                # Incremental: the overlap tail is at most overlap_tokens, so don't re-tokenize the buffer
+                current_tokens = (min(overlap_tokens, current_tokens) if overlap_text else 0) + ptoks
         if current:
             chunks.append("\n".join(current))
         return [c for c in chunks if c.strip()]
 
-    def _score_chunk_relevance(self, chunk: str, key_name: str) -> float:
+    # Lightweight keyword sets per key (built once, not per scored chunk)
+    _RELEVANCE_KEYWORDS = {
+        "key_messages": (
+            "message", "value", "benefit", "tagline", "proposition",
+            "solution", "customer", "platform", "we ", "our ", "mission", "vision", "about"
+        ),
+        "tone_of_voice": (
+            "tone", "voice", "style", "we ", "our ", "commitment", "innovation", "quality",
+            "excellence", "mission", "vision", "values"
+        ),
+    }
+    _DEFAULT_RELEVANCE_KEYWORDS = ("we ", "our ", "customer", "solution")
+    _QUOTE_CHARS = ('"', "\u201c", "\u201d")
+
+    def _score_chunk_relevance(self, chunk: str, key_name: str, tokens: Optional[int] = None) -> float:
         text_lower = chunk.lower()
-        # Lightweight keyword sets per key
-        if key_name == "key_messages":
-            keywords = [
-                "message", "value", "benefit", "tagline", "proposition",
-                "solution", "customer", "platform", "we ", "our ", "mission", "vision", "about"
-            ]
-        elif key_name == "tone_of_voice":
-            keywords = [
-                "tone", "voice", "style", "we ", "our ", "commitment", "innovation", "quality",
-                "excellence", "mission", "vision", "values"
-            ]
-        else:
-            keywords = ["we ", "our ", "customer", "solution"]
-
-        score = 0.0
-        for kw in keywords:
-            score += text_lower.count(kw)
-        # Boost for quotes as evidence snippets
-        score += text_lower.count('"') * 0.5
-        score += text_lower.count("\u201c") * 0.5
-        score += text_lower.count("\u201d") * 0.5
+        keywords = self._RELEVANCE_KEYWORDS.get(key_name, self._DEFAULT_RELEVANCE_KEYWORDS)
+        # str.count is a C-level scan per keyword; a single regex alternation over the same
+        # keywords measured ~6x slower on typical chunks, so keep per-keyword counts
+        score = float(sum(text_lower.count(kw) for kw in keywords))
+        # Boost for quotes as evidence snippets (caseless, so count on the original)
+        score += sum(chunk.count(q) for q in self._QUOTE_CHARS) * 0.5
         # Penalize overly short chunks
-        tokens = LLMClient.estimate_tokens(chunk)
+        if tokens is None:
+            tokens = LLMClient.estimate_tokens(chunk)
         if tokens < 120:
             score *= 0.7
         return score
@@ -304,15 +854,17 @@ class DiscoveryAnalyzer:
             return text, info
         # Build chunks and score
         chunks = self._chunk_text_with_overlap(text, model=target_model)
-        scored = [(self._score_chunk_relevance(c, key_name), c) for c in chunks]
+        scored = []
+        for c in chunks:
+            ctoks = LLMClient.estimate_tokens(c, model=target_model)
+            scored.append((self._score_chunk_relevance(c, key_name, ctoks), c, ctoks))
         scored.sort(key=lambda x: x[0], reverse=True)
         info["chunking_applied"] = True
         info["chunks_considered"] = len(scored)
         # Accumulate top chunks within budget
         selected: List[str] = []
         running = 0
-        for _, c in scored:
-            ctoks = LLMClient.estimate_tokens(c, model=target_model)
+        for _, c, ctoks in scored:
             if running + ctoks <= max_total_tokens:
                 selected.append(c)
                 running += ctoks
@@ -321,68 +873,215 @@ class DiscoveryAnalyzer:
         if not selected:
             # Fallback: take the highest scoring single chunk
             selected = [scored[0][1]] if scored else [text[:4000]]
-            running = LLMClient.estimate_tokens(selected[0], model=target_model)
+            running = scored[0][2] if scored else LLMClient.estimate_tokens(selected[0], model=target_model)
         info["chunks_selected"] = len(selected)
         info["tokens_after"] = running
         reduced = "\n\n".join(selected)
         return reduced, info
 
+    # === In-process LRU + TTL tier (shared by all analyzer instances) ===
+    _memory_cache: "OrderedDict[Tuple[str, str], Tuple[float, dict]]" = OrderedDict()
+    _memory_cache_lock = threading.Lock()
+    _memory_cache_max = int(os.getenv("DISCOVERY_MEMORY_CACHE_SIZE", "1024"))
+    _memory_cache_ttl = int(os.getenv("DISCOVERY_CACHE_TTL", "86400"))
+
+    @classmethod
+    def _memory_cache_get(cls, key_name: str, content_fingerprint: str) -> Optional[dict]:
+        k = (key_name, content_fingerprint)
+        with cls._memory_cache_lock:
+            hit = cls._memory_cache.get(k)
+            if hit is None:
+                return None
+            stored_at, value = hit
+            if time.time() - stored_at > cls._memory_cache_ttl:
+                del cls._memory_cache[k]
+                return None
+            cls._memory_cache.move_to_end(k)
+        # Callers mutate results (e.g. confidence boosts), so never hand out the cached object
+        return copy.deepcopy(value)
+
+    @classmethod
+    def _memory_cache_put(cls, key_name: str, content_fingerprint: str, result: dict) -> None:
+        k = (key_name, content_fingerprint)
+        value = copy.deepcopy(result)
+        with cls._memory_cache_lock:
+            cls._memory_cache[k] = (time.time(), value)
+            cls._memory_cache.move_to_end(k)
+            while len(cls._memory_cache) > cls._memory_cache_max:
+                cls._memory_cache.popitem(last=False)
+
+    # === Semantic tier for visual_text_alignment (near-duplicate inputs) ===
+    # fingerprint -> (unit-length embedding, result); persisted as JSONL and reloaded once.
+    # Only results from the deterministic call settings (gpt-5, minimal effort) are stored.
+    _semantic_cache: "OrderedDict[str, Tuple[List[float], dict]]" = OrderedDict()
+    _semantic_cache_lock = threading.Lock()
+    _semantic_cache_loaded = False
+    _semantic_log_lines = 0  # Lines in the JSONL; compacted to the live entries past 2x the cap
+    _semantic_cache_max = int(os.getenv("DISCOVERY_SEMANTIC_CACHE_SIZE", "256"))
+    _semantic_threshold = float(os.getenv("DISCOVERY_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+    _EMBEDDING_MODEL = "text-embedding-3-small"
+    _EMBEDDING_DIMS = 256  # Truncated embeddings keep the pure-Python dot products cheap
+
+    @classmethod
+    def _semantic_cache_load(cls) -> None:
+        """Read persisted entries once per process (newest last, so they survive eviction)."""
+        with cls._semantic_cache_lock:
+            if cls._semantic_cache_loaded:
+                return
+            cls._semantic_cache_loaded = True
+            try:
+                with open(_SEMANTIC_CACHE_LOG, 'rb') as f:
+                    for line in f:
+                        cls._semantic_log_lines += 1
+                        try:
+                            entry = _json_loads(line)
+                            cls._semantic_cache[entry["fingerprint"]] = (entry["embedding"], entry["result"])
+                            cls._semantic_cache.move_to_end(entry["fingerprint"])
+                        except Exception:
+                            continue
+            except OSError:
+                return
+            while len(cls._semantic_cache) > cls._semantic_cache_max:
+                cls._semantic_cache.popitem(last=False)
+            if cls._semantic_log_lines > len(cls._semantic_cache):
+                cls._semantic_compact()
+
+    @classmethod
+    def _semantic_compact(cls) -> None:
+        """Rewrite the JSONL with only the live entries. Caller must hold _semantic_cache_lock."""
+        try:
+            _rewrite_jsonl(_SEMANTIC_CACHE_LOG, [
+                {"fingerprint": fp, "embedding": emb, "result": result}
+                for fp, (emb, result) in cls._semantic_cache.items()
+            ])
+            cls._semantic_log_lines = len(cls._semantic_cache)
+        except Exception:
+            pass
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        """Unit-length embedding of text, or None if the embeddings endpoint fails."""
+        try:
+            future = LLM_EXECUTOR.submit(
+                self.llm_client.client.embeddings.create,
+                model=self._EMBEDDING_MODEL, input=text, dimensions=self._EMBEDDING_DIMS,
+            )
+            vec = future.result(timeout=15).data[0].embedding
+        except Exception:
+            return None
+        norm = sum(x * x for x in vec) ** 0.5
+        return [x / norm for x in vec] if norm else None
+
+    def _semantic_lookup(self, text: str) -> Tuple[Optional[dict], Optional[List[float]], float]:
+        """Best prior result with cosine similarity >= threshold. Returns (result|None, embedding, similarity)."""
+        vec = self._embed(text)
+        if vec is None:
+            return None, None, 0.0
+        self._semantic_cache_load()
+        best_fp, best_sim = None, 0.0
+        with self._semantic_cache_lock:
+            for fp, (emb, _) in self._semantic_cache.items():
+                sim = sum(a * b for a, b in zip(vec, emb))
+                if sim > best_sim:
+                    best_fp, best_sim = fp, sim
+            if best_fp is None or best_sim < self._semantic_threshold:
+                return None, vec, best_sim
+            self._semantic_cache.move_to_end(best_fp)
+            result = self._semantic_cache[best_fp][1]
+        return copy.deepcopy(result), vec, best_sim
+
+    def _semantic_store(self, content_fingerprint: str, vec: List[float], result: dict) -> None:
+        self._semantic_cache_load()
+        cls = type(self)
+        with cls._semantic_cache_lock:
+            cls._semantic_cache[content_fingerprint] = (vec, copy.deepcopy(result))
+            cls._semantic_cache.move_to_end(content_fingerprint)
+            while len(cls._semantic_cache) > cls._semantic_cache_max:
+                cls._semantic_cache.popitem(last=False)
+            try:
+                _append_jsonl(_SEMANTIC_CACHE_LOG, {"fingerprint": content_fingerprint, "embedding": vec, "result": result})
+                cls._semantic_log_lines += 1
+            except Exception:
+                pass
+            # Bound the file: evicted and superseded lines are dropped once it doubles the cap
+            if cls._semantic_log_lines > 2 * cls._semantic_cache_max:
+                cls._semantic_compact()
+
     # === Per-key disk cache helpers ===
     def _key_cache_path(self, key_name: str, content_hash: str) -> str:
-        d = os.path.join(self.cache_root, key_name)
-        os.makedirs(d, exist_ok=True)
-        return os.path.join(d, f"{content_hash}.json")
+        return os.path.join(_key_cache_dir(self.cache_root, key_name), f"{content_hash}.json")
 
     def _load_cached_result(self, key_name: str, content_fingerprint: str) -> Optional[dict]:
-        # Try Redis first
+        # Memory first, then Redis, then disk; lower-tier hits are promoted to memory
+        cached = self._memory_cache_get(key_name, content_fingerprint)
+        if cached is not None:
+            return cached
         if self.redis is not None:
             try:
                 v = self.redis.get(f"discovery:{key_name}:{content_fingerprint}")
                 if v:
-                    return json.loads(v)
+                    cached = _json_loads(v)
+                    self._memory_cache_put(key_name, content_fingerprint, cached)
+                    return cached
             except Exception:
                 pass
-        # Fallback to disk
+        # Fallback to disk (file mtime is the write time; stale entries are ignored)
         path = self._key_cache_path(key_name, content_fingerprint)
         try:
-            if os.path.exists(path):
-                with open(path, 'r') as f:
-                    return json.load(f)
+            st = os.stat(path)
+        except OSError:
+            return None
+        if time.time() - st.st_mtime > self._memory_cache_ttl:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                cached = _json_loads(f.read())
+            self._memory_cache_put(key_name, content_fingerprint, cached)
+            return cached
         except Exception:
             return None
-        return None
 
     def _save_cached_result(self, key_name: str, content_fingerprint: str, result: dict) -> None:
+        try:
+            self._memory_cache_put(key_name, content_fingerprint, result)
+            # Serialize now (callers go on to mutate result); write Redis/disk in the background
+            data = _json_dumps_bytes(result)
+            _CACHE_WRITER.submit(self._persist_cached_result, key_name, content_fingerprint, data)
+        except Exception:
+            pass
+
+    def _persist_cached_result(self, key_name: str, content_fingerprint: str, data: bytes) -> None:
         try:
             # Redis
             if self.redis is not None:
                 try:
                     ttl = int(os.getenv("DISCOVERY_CACHE_TTL", "86400"))
-                    self.redis.setex(f"discovery:{key_name}:{content_fingerprint}", ttl, json.dumps(result))
+                    self.redis.setex(f"discovery:{key_name}:{content_fingerprint}", ttl, data)
                 except Exception:
                     pass
-            # Disk
+            # Disk: write to a temp file and rename so readers never see a truncated entry
             path = self._key_cache_path(key_name, content_fingerprint)
-            with open(path, 'w') as f:
-                json.dump(result, f)
+            tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+            try:
+                with open(tmp, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
         except Exception:
             pass
 
-    def _compute_fingerprint(self, key_name: str, text: str, schema_class) -> str:
-        try:
-            try:
-                schema_dict = schema_class.schema()
-            except Exception:
-                schema_dict = schema_class.model_json_schema()
-        except Exception:
-            schema_dict = {}
-        prompt = DECONSTRUCTION_KEYS_PROMPTS[key_name]["prompt"]
-        m = hashlib.sha256()
-        m.update((text or "").encode())
-        m.update(prompt.encode())
-        m.update(json.dumps(schema_dict, sort_keys=True).encode())
-        m.update(PROMPT_VERSION.encode())
-        return m.hexdigest()
+    def _compute_fingerprint(self, key_name: str, text: str, schema_class,
+                             content_digest: Optional[str] = None, presanitized: bool = False) -> str:
+        # Prompt/schema/version part is hashed once per key; only the content is hashed per call.
+        # With a digest of the raw input, that stands in for the text: sanitizing and the key's
+        # fixed truncation budget are deterministic, so the same input maps to the same prompt.
+        m = _fingerprint_state(key_name, schema_class).copy()
+        if content_digest:
+            m.update(f"\0digest:{content_digest}:{int(presanitized)}".encode("ascii"))
+        else:
+            m.update((text or "").encode("utf-8", "replace"))
+        return _key_digest(m)
         
     def _analyze_all_sequential(self, text_content: str, screenshots: Optional[List[str]] = None) -> Dict[str, Any]:
         """
@@ -401,34 +1100,34 @@ class DiscoveryAnalyzer:
         
         # Run each analysis sequentially
         analyses = [
-            ('positioning_themes', lambda: self.analyze_positioning_themes(text_content)),
-            ('key_messages', lambda: self.analyze_key_messages(text_content)),
-            ('tone_of_voice', lambda: self.analyze_tone_of_voice(text_content))
+            ('positioning_themes', lambda: self.analyze_positioning_themes(text_content, presanitized=True)),
+            ('key_messages', lambda: self.analyze_key_messages(text_content, presanitized=True)),
+            ('tone_of_voice', lambda: self.analyze_tone_of_voice(text_content, presanitized=True))
         ]
         
         for key_name, analysis_func in analyses:
             try:
-                print(f"[INFO] Starting sequential analysis: {key_name}")
+                _log.info(f"Starting sequential analysis: {key_name}")
                 result, metrics = analysis_func()
                 
                 if result:
                     results[key_name] = result
                     combined_metrics['analyses_completed'] += 1
-                    print(f"[INFO] ✅ {key_name} completed: {metrics.get('token_usage', 0)} tokens in {metrics.get('latency_ms', 0)}ms")
+                    _log.info(f"✅ {key_name} completed: {metrics.get('token_usage', 0)} tokens in {metrics.get('latency_ms', 0)}ms")
                 else:
                     combined_metrics['analyses_failed'] += 1
                     results[key_name] = {
                         'error': metrics.get('error', 'unknown_error'),
                         'message': f'Analysis failed for {key_name}'
                     }
-                    print(f"[INFO] ❌ {key_name} failed: {metrics.get('error', 'unknown')}")
+                    _log.info(f"❌ {key_name} failed: {metrics.get('error', 'unknown')}")
                 
                 # Aggregate metrics
                 combined_metrics['total_tokens'] += metrics.get('token_usage', 0)
                 combined_metrics['individual_metrics'][key_name] = metrics
                 
             except Exception as e:
-                print(f"[ERROR] Sequential analysis {key_name} failed with exception: {str(e)}")
+                _log.error(f"Sequential analysis {key_name} failed with exception: {str(e)}")
                 combined_metrics['analyses_failed'] += 1
                 results[key_name] = {
                     'error': 'execution_error',
@@ -445,36 +1144,227 @@ class DiscoveryAnalyzer:
             'completion_rate': combined_metrics['analyses_completed'] / 3.0
         }
     
-    def _validate_and_sanitize_input(self, text_content: str, max_chars: int = 30000) -> str:
-        """Validate and sanitize analysis input."""
+    # === Combined single-call analysis for the three text keys ===
+    _COMBINED_TEXT_KEYS = (
+        ("positioning_themes", PositioningThemesResult),
+        ("key_messages", KeyMessagesResult),
+        ("tone_of_voice", ToneOfVoiceResult),
+    )
+
+    @classmethod
+    @functools.lru_cache(maxsize=1)
+    def _combined_text_schema(cls) -> dict:
+        """One strict JSON schema with a required section per text key (shared $defs hoisted to the root)."""
+        properties: Dict[str, Any] = {}
+        defs: Dict[str, Any] = {}
+        for key_name, schema_class in cls._COMBINED_TEXT_KEYS:
+            section = dict(_model_json_schema(schema_class))
+            defs.update(section.pop("$defs", {}))
+            properties[key_name] = section
+        schema = {
+            "type": "object",
+            "properties": properties,
+            "required": [key_name for key_name, _ in cls._COMBINED_TEXT_KEYS],
+            "additionalProperties": False,
+        }
+        if defs:
+            schema["$defs"] = defs
+        return schema
+
+    _COMBINED_TEXT_INSTRUCTIONS = (
+        "You are a senior brand strategist. Analyze the website text below and return ONE JSON object "
+        "with exactly three top-level fields:\n\n"
+        "1. \"positioning_themes\": {\"themes\": [3-5 items of {theme (≤50), description (≤200), "
+        "evidence_quotes (1-3 direct quotes), confidence (0-100)}]} — high-level concepts the brand is trying to own.\n"
+        "2. \"key_messages\": {\"key_messages\": [3-5 items of {message (≤200, exact wording), context (≤300), "
+        "type (\"Tagline\"|\"Value Proposition\"), confidence (0-100)}]} — the most important messages the brand "
+        "is trying to land; de-duplicate and skip navigation/boilerplate.\n"
+        "3. \"tone_of_voice\": {primary_tone: {tone (≤30), justification (≤200), evidence_quote}, "
+        "secondary_tone: {tone (≤30), justification (≤200), evidence_quote}, contradictions: up to 3 items of "
+        "{contradiction (≤200), evidence_quote}, confidence (0-100)}.\n\n"
+        "Use only the text below; quotes must be taken from it. Output only valid JSON.\n\n"
+    )
+
+    @classmethod
+    @functools.lru_cache(maxsize=1)
+    def _combined_prompt_hash(cls) -> str:
+        """Short hash of the combined instructions (logged in place of the per-key prompt hash)."""
+        return hashlib.sha256(cls._COMBINED_TEXT_INSTRUCTIONS.encode()).hexdigest()[:8]
+
+    @classmethod
+    @functools.lru_cache(maxsize=1)
+    def _combined_fingerprint_state(cls):
+        """SHA-256 state seeded with the combined prompt, schema and prompt version."""
+        m = hashlib.sha256()
+        m.update(cls._COMBINED_TEXT_INSTRUCTIONS.encode())
+        m.update(json.dumps(cls._combined_text_schema(), sort_keys=True).encode())
+        m.update(PROMPT_VERSION.encode())
+        return m
+
+    def _combined_fingerprint(self, text: str) -> str:
+        m = self._combined_fingerprint_state().copy()
+        m.update((text or "").encode("utf-8", "replace"))
+        return _key_digest(m)
+
+    def analyze_text_keys_combined(self, text_content: str) -> Dict[str, Tuple[Optional[dict], Dict[str, Any]]]:
+        """
+        Analyze positioning themes, key messages and tone of voice with one LLM call.
+
+        The corpus is sent once and the model returns one JSON object with a section per
+        key; each section is validated against its own schema. Returns
+        {key_name: (result|None, metrics)} so callers can fall back per key.
+        """
+        start_time = time.time()
+        text_content, original_tokens, trimmed_tokens = LLMClient.trim_to_tokens(
+            text_content, _max_prompt_tokens("text_keys_combined")
+        )
+        prompt = self._COMBINED_TEXT_INSTRUCTIONS + f"TEXT CONTENT:\n{text_content}"
+        content_fingerprint = self._combined_fingerprint(text_content)
+
+        base_metrics: Dict[str, Any] = {
+            "combined_call": True,
+            "prompt_hash": self._combined_prompt_hash(),
+            "original_tokens": original_tokens,
+            "trimmed_tokens": trimmed_tokens,
+        }
+        cached = self._load_cached_result("text_keys_combined", content_fingerprint)
+        if cached and all(cached.get(key_name) for key_name, _ in self._COMBINED_TEXT_KEYS):
+            return {
+                key_name: (cached[key_name], dict(base_metrics, key_name=key_name, cache_hit=True,
+                                                  latency_ms=0, token_usage=0, validation_status="success"))
+                for key_name, _ in self._COMBINED_TEXT_KEYS
+            }
+        outputs: Dict[str, Tuple[Optional[dict], Dict[str, Any]]] = {}
+        raw_output = None
+        try:
+            raw_output, meta = self.llm_client.choose_and_call(
+                key_name="text_keys_combined",
+                prompt=prompt,
+                schema=self._combined_text_schema(),
+                enforce_schema=True,
+                max_output_tokens=_MAX_OUTPUT_TOKENS["text_keys_combined"],
+            )
+            base_metrics.update({
+                "api_used": meta.get("api_used"),
+                "model": meta.get("model"),
+                "breaker_open": meta.get("breaker_open", False)
+            })
+            # Token usage is reported once for the shared call (on the first key)
+            combined_tokens = meta.get("token_usage", 0)
+            payload = _json_loads(raw_output) if raw_output else {}
+            if not isinstance(payload, dict):
+                payload = {}
+        except Exception as e:
+            base_metrics.update({"error": "llm_call_failed", "error_details": str(e)})
+            combined_tokens = 0
+            payload = {}
+
+        latency_ms = int((time.time() - start_time) * 1000)
+        for i, (key_name, schema_class) in enumerate(self._COMBINED_TEXT_KEYS):
+            metrics = dict(base_metrics, key_name=key_name, latency_ms=latency_ms,
+                           token_usage=combined_tokens if i == 0 else 0)
+            section = payload.get(key_name)
+            result, repairs = (None, ["section_missing"]) if section is None else \
+                self.validator.validate_with_repair(section, schema_class, key_name)
+            metrics["validation_status"] = "success" if result else "failed"
+            metrics["repairs"] = repairs
+            if not result:
+                metrics.setdefault("error", "validation_failed")
+            self._log_discovery_result(key_name, _json_dumps_bytes(section).decode() if section is not None else raw_output, result, metrics)
+            outputs[key_name] = (_dump_result(result) if result else None, metrics)
+        # Only complete bundles are cached; partial ones fall back to per-key calls (which cache themselves)
+        if all(result for result, _ in outputs.values()):
+            self._save_cached_result("text_keys_combined", content_fingerprint,
+                                     {key_name: result for key_name, (result, _) in outputs.items()})
+        return outputs
+
+    def _analyze_all_combined(self, text_content: str) -> Dict[str, Any]:
+        """Run the combined single-call analysis, falling back to per-key calls for failed sections."""
+        start_time = time.time()
+        results = {}
+        combined_metrics = {
+            'total_latency_ms': 0,
+            'analyses_completed': 0,
+            'analyses_failed': 0,
+            'total_tokens': 0,
+            'individual_metrics': {},
+            'execution_mode': 'combined'
+        }
+        fallbacks = {
+            'positioning_themes': self.analyze_positioning_themes,
+            'key_messages': self.analyze_key_messages,
+            'tone_of_voice': self.analyze_tone_of_voice,
+        }
+
+        for key_name, (result, metrics) in self.analyze_text_keys_combined(text_content).items():
+            if not result:
+                _log.info(f"Combined analysis missing {key_name}; running dedicated call")
+                try:
+                    result, metrics = fallbacks[key_name](text_content, presanitized=True)
+                except Exception as e:
+                    result, metrics = None, {'error': 'execution_error', 'error_details': str(e)}
+            if result:
+                results[key_name] = result
+                combined_metrics['analyses_completed'] += 1
+            else:
+                combined_metrics['analyses_failed'] += 1
+                results[key_name] = {
+                    'error': metrics.get('error', 'unknown_error'),
+                    'message': f'Analysis failed for {key_name}'
+                }
+            combined_metrics['total_tokens'] += metrics.get('token_usage', 0)
+            combined_metrics['individual_metrics'][key_name] = metrics
+
+        combined_metrics['total_latency_ms'] = int((time.time() - start_time) * 1000)
+
+        return {
+            'results': results,
+            'metrics': combined_metrics,
+            'success': combined_metrics['analyses_completed'] > 0,
+            'completion_rate': combined_metrics['analyses_completed'] / 3.0
+        }
+
+    def _validate_and_sanitize_input(self, text_content: str, max_chars: int = 30000, presanitized: bool = False) -> str:
+        """Validate and sanitize analysis input.
+
+        With presanitized=True (input already passed through this method) only the
+        length check and truncation run; the tag-stripping regexes are skipped.
+        """
         if not text_content or len(text_content.strip()) < 100:
             raise ValueError("Insufficient content for analysis (minimum 100 characters required)")
         
         # Intelligent truncation to prevent timeouts while preserving key content
         if len(text_content) > max_chars:
-            print(f"[INFO] Smart truncating content from {len(text_content)} to {max_chars} chars for faster analysis")
-            # Try to preserve important sections (headings, key phrases)
-            content_parts = text_content.split('\n')
-            truncated_lines = []
-            current_length = 0
-            
-            for line in content_parts:
-                line_length = len(line) + 1  # +1 for newline
-                if current_length + line_length > max_chars - 50:  # Leave buffer
-                    break
-                # Prioritize lines with brand-related keywords
-                is_important = any(keyword in line.lower() for keyword in 
-                                 ['mission', 'vision', 'values', 'about', 'brand', 'company', 'we are', 'our'])
-                if is_important or current_length < max_chars * 0.8:  # Always include important lines
+            _log.info(f"Smart truncating content from {len(text_content)} to {max_chars} chars for faster analysis")
+            # Keep whole lines for the first ~80%, then only brand-keyword lines until the budget is used.
+            # Line boundaries come from str.find/rfind and keyword lines from one regex scan, so long
+            # inputs are not split into per-line Python objects.
+            budget = max_chars - 50  # Leave buffer
+            head_end = text_content.find('\n', max((4 * max_chars + 4) // 5 - 1, 0))
+            if head_end == -1 or head_end + 1 > budget:
+                # Head alone exhausts the budget: keep the whole lines that fit
+                head_end = text_content.rfind('\n', 0, budget)
+                truncated_lines = [text_content[:head_end]] if head_end != -1 else []
+            else:
+                truncated_lines = [text_content[:head_end]]
+                remaining = budget - (head_end + 1)
+                for m in _BRAND_LINE_RE.finditer(text_content, head_end + 1):
+                    line = m.group(0)
+                    if len(line) + 1 > remaining:
+                        break
                     truncated_lines.append(line)
-                    current_length += line_length
+                    remaining -= len(line) + 1
             
             text_content = '\n'.join(truncated_lines) + "... [content intelligently truncated for analysis]"
         
-        # Remove potential script injection attempts
-        import re
-        text_content = re.sub(r'<script[^>]*>.*?</script>', '', text_content, flags=re.IGNORECASE | re.DOTALL)
-        text_content = re.sub(r'<[^>]+>', '', text_content)  # Remove HTML tags
+        if presanitized:
+            return text_content.strip()
+        
+        # Remove potential script injection attempts. Distilled corpora are usually plain
+        # text, so a C-level '<' scan lets both regex passes be skipped entirely.
+        if '<' in text_content:
+            text_content = _SCRIPT_RE.sub('', text_content)
+            text_content = _TAG_RE.sub('', text_content)  # Remove HTML tags
         
         return text_content.strip()
 
@@ -504,31 +1394,38 @@ class DiscoveryAnalyzer:
             }
         
         # Check if we should run sequentially (for debugging or if concurrent keeps timing out)
-        if force_sequential or os.getenv('DISCOVERY_SEQUENTIAL_MODE', 'false').lower() == 'true':
-            print("[INFO] Running Discovery analyses sequentially (timeout protection mode)")
+        if force_sequential or _FLAGS.sequential_mode:
+            _log.info("Running Discovery analyses sequentially (timeout protection mode)")
             return self._analyze_all_sequential(validated_content, screenshots)
         
-        # Prepare concurrent tasks (limit LLM concurrency to 2 for stability)
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-            # Submit all analysis tasks concurrently
-            future_to_key = {
-                executor.submit(self.analyze_positioning_themes, validated_content): 'positioning_themes',
-                executor.submit(self.analyze_key_messages, validated_content): 'key_messages', 
-                executor.submit(self.analyze_tone_of_voice, validated_content): 'tone_of_voice'
-            }
-            
-            # Collect results as they complete
-            results = {}
-            combined_metrics = {
-                'total_latency_ms': 0,
-                'analyses_completed': 0,
-                'analyses_failed': 0,
-                'total_tokens': 0,
-                'individual_metrics': {}
-            }
-            
-            for future in concurrent.futures.as_completed(future_to_key, timeout=300):  # 5 min total timeout for all analyses
-                key_name = future_to_key[future]
+        # Opt-in: one LLM call for all three text keys (corpus sent once instead of three times)
+        if _FLAGS.combined_text_call:
+            _log.info("Running Discovery text analyses in a single combined call")
+            return self._analyze_all_combined(validated_content)
+        
+        # Shared analysis pool, at most 2 of this scan's keys in flight for stability
+        content_digest = _content_digest(validated_content)  # Hashed once, shared by all three keys
+        tasks = [
+            (key_name, functools.partial(analyze, validated_content, presanitized=True, content_digest=content_digest))
+            for key_name, analyze in (
+                ('positioning_themes', self.analyze_positioning_themes),
+                ('key_messages', self.analyze_key_messages),
+                ('tone_of_voice', self.analyze_tone_of_voice),
+            )
+        ]
+        
+        # Collect results as they complete
+        results = {}
+        combined_metrics = {
+            'total_latency_ms': 0,
+            'analyses_completed': 0,
+            'analyses_failed': 0,
+            'total_tokens': 0,
+            'individual_metrics': {}
+        }
+        
+        try:
+            for key_name, future in _as_completed_gated(tasks, limit=2, timeout=300):  # 5 min total timeout for all analyses
                 try:
                     result, metrics = future.result()
                     
@@ -554,17 +1451,25 @@ class DiscoveryAnalyzer:
                     }
                 except Exception as e:
                     combined_metrics['analyses_failed'] += 1
-                    # Log the full error details for debugging
-                    import traceback
-                    error_details = traceback.format_exc()
-                    print(f"[ERROR] Analysis {key_name} failed with exception: {str(e)}")
-                    print(f"[TRACEBACK] {error_details}")
+                    # Full traceback only with DISCOVERY_VERBOSE_ERRORS (frame walk is costly in error storms)
+                    error_details = _error_summary(e)
+                    _log.error(f"Analysis {key_name} failed with exception: {str(e)}")
+                    _log.debug("%s", error_details)
                     
                     results[key_name] = {
                         'error': 'execution_error',
                         'message': f'Execution error for {key_name}: {str(e)}',
                         'traceback': error_details
                     }
+        except concurrent.futures.TimeoutError:
+            # Overall deadline hit: stop waiting on stragglers (unsubmitted ones never start)
+            for key_name, _ in tasks:
+                if key_name not in results:
+                    combined_metrics['analyses_failed'] += 1
+                    results[key_name] = {
+                        'error': 'timeout',
+                        'message': f'Analysis timed out for {key_name}'
+                    }
         
         # Calculate total time
         combined_metrics['total_latency_ms'] = int((time.time() - start_time) * 1000)
@@ -577,81 +1482,61 @@ class DiscoveryAnalyzer:
         }
 
     @track_discovery_performance("positioning_themes")
-    def analyze_positioning_themes(self, text_content: str) -> Tuple[Optional[dict], Dict[str, Any]]:
+    @_coalesce_inflight("positioning_themes")
+    def analyze_positioning_themes(self, text_content: str, presanitized: bool = False,
+                                   content_digest: Optional[str] = None) -> Tuple[Optional[dict], Dict[str, Any]]:
         """Analyze positioning themes using GPT-5 with optimized content handling."""
-        from openai import OpenAI
         
         start_time = time.time()
         metrics = {"key_name": "positioning_themes"}
         
         try:
             # Validate and sanitize input with aggressive truncation for performance
-            text_content = self._validate_and_sanitize_input(text_content, max_chars=15000)
-            print(f"[INFO] Positioning themes analysis - content length: {len(text_content)} chars")
-            
-            # Load environment variables if needed
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                try:
-                    from dotenv import load_dotenv
-                    load_dotenv()
-                    api_key = os.getenv("OPENAI_API_KEY")
-                except ImportError:
-                    pass
+            text_content = self._validate_and_sanitize_input(text_content, max_chars=15000, presanitized=presanitized)
+            # Token-aware bound (head + tail) for dense corpora; the char budget above is the main limit
+            text_content, original_tokens, trimmed_tokens = LLMClient.trim_to_tokens(
+                text_content, _max_prompt_tokens("positioning_themes")
+            )
+            metrics["original_tokens"] = original_tokens
+            metrics["trimmed_tokens"] = trimmed_tokens
+            _log.info(f"Positioning themes analysis - content length: {len(text_content)} chars")
             
-            if not api_key:
-                raise ValueError("OPENAI_API_KEY environment variable is required for Discovery analysis")
-            client = OpenAI(api_key=api_key)
+            client = self.llm_client.client
             prompt = DECONSTRUCTION_KEYS_PROMPTS["positioning_themes"]["prompt"]
             
-            # Use GPT-5 with Responses API when available
-            try:
-                if not _should_use_responses():
-                    raise Exception("Responses disabled by capability/env")
-                # First try GPT-5 with Responses API (recommended approach)
-                tokens_needed = self._estimate_tokens(text_content)
-                response = safe_responses_call(
-                    client,
-                    timeout_seconds=self._adaptive_timeout(tokens_needed, cap=75),
-                    model="gpt-5",
-                    input=f"You are a senior brand strategist. Analyze the following website content and identify 3-5 key positioning themes. Output only valid JSON.\n\n{prompt.format(text_content=text_content)}",
-                    reasoning={
-                        "effort": "minimal"  # Fastest reasoning for speed
-                    },
-                    text={
-                        "verbosity": "low"  # Concise output for faster response
-                    }
-                )
-                # Extract text content from Responses API response
-                # GPT-5 Responses API returns a list of items including reasoning and output messages
-                raw_output = None
-                
-                if hasattr(response, 'content') and isinstance(response.content, list):
-                    # Look for ResponseOutputMessage in the content list
-                    for item in response.content:
-                        if hasattr(item, 'type') and item.type == 'message':
-                            if hasattr(item, 'content') and isinstance(item.content, list):
-                                # Extract text from message content
-                                for content_item in item.content:
-                                    if hasattr(content_item, 'text'):
-                                        raw_output = content_item.text
-                                        break
-                            elif hasattr(item, 'content') and isinstance(item.content, str):
-                                raw_output = item.content
-                            break
-                elif hasattr(response, 'content') and isinstance(response.content, str):
-                    raw_output = response.content
-                elif hasattr(response, 'text') and isinstance(response.text, str):
-                    raw_output = response.text
-                
-                if not raw_output:
-                    raise Exception(f"Could not extract text from GPT-5 response. Response content type: {type(response.content) if hasattr(response, 'content') else 'no content'}, first item type: {type(response.content[0]) if hasattr(response, 'content') and isinstance(response.content, list) and response.content else 'no items'}")
-                    
-                metrics["api_used"] = "responses_api"
-                metrics["reasoning_effort"] = "minimal"
-                
-            except Exception as responses_api_error:
-                print(f"[INFO] GPT-5 Responses API not available, using reliable GPT-4o Chat Completions")
+            # Use GPT-5 with Responses API when available (capability known and key breaker closed)
+            raw_output = None
+            if _responses_available("positioning_themes") and _claim_responses("positioning_themes"):
+                try:
+                    # First try GPT-5 with Responses API (recommended approach)
+                    tokens_needed = self._estimate_tokens(text_content)
+                    response = safe_responses_call(
+                        client,
+                        timeout_seconds=self._adaptive_timeout(tokens_needed, cap=75),
+                        model="gpt-5",
+                        input=f"You are a senior brand strategist. Analyze the following website content and identify 3-5 key positioning themes. Output only valid JSON.\n\n{prompt.format(text_content=text_content)}",
+                        reasoning={
+                            "effort": "minimal"  # Fastest reasoning for speed
+                        },
+                        text={
+                            "verbosity": "low"  # Concise output for faster response
+                        },
+                        stream=True  # Output text is accumulated from deltas as it is generated
+                    )
+                    raw_output = response.output_text
+
+                    if not raw_output:
+                        raise Exception("Could not extract text from GPT-5 response: empty output_text stream")
+
+                    metrics["api_used"] = "responses_api"
+                    metrics["reasoning_effort"] = "minimal"
+                    _record_responses_result("positioning_themes", success=True)
+                except Exception:
+                    _record_responses_result("positioning_themes", success=False)
+                    raw_output = None
+            
+            if raw_output is None:
+                _log.info("GPT-5 Responses API not available, using reliable GPT-4o Chat Completions")
                 # Fallback to Chat Completions API with reliable GPT-4o  
                 response = safe_openai_call(
                     client,
@@ -662,11 +1547,12 @@ class DiscoveryAnalyzer:
                         {"role": "system", "content": "You are a senior brand strategist. Analyze website content and identify 3-5 key positioning themes. Output only valid JSON."},
                         {"role": "user", "content": prompt.format(text_content=text_content)}
                     ],
-                    response_format={"type": "json_object"},
+                    response_format=_POSITIONING_RESPONSE_FORMAT,
                     temperature=0.2,
-                    max_tokens=2000
+                    max_tokens=2000,
+                    stream=True
                 )
-                raw_output = (json.dumps(getattr(response.choices[0].message, "parsed"))
+                raw_output = (_json_dumps_bytes(getattr(response.choices[0].message, "parsed")).decode()
                                if getattr(response.choices[0].message, "parsed", None) is not None
                                else response.choices[0].message.content)
                 metrics["api_used"] = "chat_completions_fallback"
@@ -681,10 +1567,10 @@ class DiscoveryAnalyzer:
                 metrics["model"] = "gpt-5"
             else:
                 # Chat Completions API structure
-                metrics["token_usage"] = response.usage.total_tokens if hasattr(response, 'usage') else 0
+                metrics["token_usage"] = getattr(getattr(response, 'usage', None), 'total_tokens', 0)
                 metrics["model"] = response.model if hasattr(response, 'model') else "gpt-4o"
             
-            # Validate and repair
+            # Schema-constrained output takes validate_with_repair's single-pass fast path
             result, repairs = self.validator.validate_with_repair(
                 raw_output,
                 PositioningThemesResult,
@@ -717,7 +1603,7 @@ class DiscoveryAnalyzer:
                     metrics.setdefault("token_usage", 0)
                     # Log degraded result
                     self._log_discovery_result("positioning_themes", raw_output, fallback_model, metrics)
-                    return fallback_model.dict(), metrics
+                    return _dump_result(fallback_model), metrics
                 except Exception as _degrade_err:
                     # If even degraded synthesis fails, continue to return None with metrics
                     metrics["degrade_error"] = str(_degrade_err)
@@ -725,7 +1611,7 @@ class DiscoveryAnalyzer:
             # Log for analysis
             self._log_discovery_result("positioning_themes", raw_output, result, metrics)
             
-            return result.dict() if result else None, metrics
+            return _dump_result(result) if result else None, metrics
             
         except ValueError as e:
             # Input validation errors
@@ -738,12 +1624,12 @@ class DiscoveryAnalyzer:
             metrics["error"] = "timeout"
             metrics["error_details"] = str(e)
             metrics["latency_ms"] = int((time.time() - start_time) * 1000)
-            print(f"[ERROR] Positioning themes analysis timed out after {metrics['latency_ms']}ms")
+            _log.error(f"Positioning themes analysis timed out after {metrics['latency_ms']}ms")
             self._log_discovery_error("positioning_themes", e, metrics)
             
             # Try a simplified fallback analysis with even smaller content
             try:
-                print("[INFO] Attempting simplified positioning themes analysis as fallback...")
+                _log.info("Attempting simplified positioning themes analysis as fallback...")
                 simplified_content = text_content[:8000] + "... [simplified for fallback analysis]"
                 fallback_response = safe_openai_call(
                     client,
@@ -754,7 +1640,8 @@ class DiscoveryAnalyzer:
                         {"role": "system", "content": "You are a brand analyst. Extract 2-3 key positioning themes quickly. Output only valid JSON."},
                         {"role": "user", "content": f"Extract the main positioning themes from this website content:\n\n{simplified_content}\n\nOutput JSON with 'themes' array containing objects with 'theme', 'description', 'evidence_quotes', 'confidence' fields."}
                     ],
-                    response_format={"type": "json_object"}
+                    response_format={"type": "json_object"},
+                    max_tokens=_MAX_OUTPUT_TOKENS["positioning_themes_fallback"]
                 )
                 
                 fallback_output = fallback_response.choices[0].message.content
@@ -763,10 +1650,10 @@ class DiscoveryAnalyzer:
                 )
                 
                 if fallback_result:
-                    print("[INFO] Fallback positioning themes analysis succeeded")
+                    _log.info("Fallback positioning themes analysis succeeded")
                     metrics["fallback_used"] = True
                     metrics["fallback_model"] = "gpt-4o-mini"
-                    return fallback_result.dict(), metrics
+                    return _dump_result(fallback_result), metrics
                 # If fallback still didn't validate, synthesize degraded
                 snippet = (text_content[:200] + "...") if isinstance(text_content, str) and len(text_content) > 200 else (text_content or "")
                 degraded_payload = {
@@ -784,35 +1671,26 @@ class DiscoveryAnalyzer:
                 metrics["degraded"] = True
                 metrics.setdefault("model", "fallback")
                 metrics.setdefault("token_usage", 0)
-                return degraded_model.dict(), metrics
+                return _dump_result(degraded_model), metrics
             except Exception as fallback_error:
-                print(f"[ERROR] Fallback analysis also failed: {fallback_error}")
+                _log.error(f"Fallback analysis also failed: {fallback_error}")
                 metrics["fallback_error"] = str(fallback_error)
             
             return None, metrics
         except Exception as e:
             # More detailed error tracking
-            import traceback
-            error_trace = traceback.format_exc()
+            error_trace = _error_summary(e)
             
             # Check for specific OpenAI errors
-            error_type = "unknown_error"
-            if "rate limit" in str(e).lower():
-                error_type = "rate_limit"
-            elif "insufficient_quota" in str(e).lower():
-                error_type = "quota_exceeded"
-            elif "json" in str(e).lower() or "parsing" in str(e).lower():
-                error_type = "json_parse_error"
-            elif "timeout" in str(e).lower():
-                error_type = "timeout"
+            error_type = _classify_error(e)
             
             metrics["error"] = error_type
             metrics["error_details"] = str(e)
             metrics["error_traceback"] = error_trace
             metrics["latency_ms"] = int((time.time() - start_time) * 1000)
             
-            print(f"[ERROR] positioning_themes analysis failed: {str(e)}")
-            print(f"[TRACEBACK] {error_trace}")
+            _log.error(f"positioning_themes analysis failed: {str(e)}")
+            _log.debug("%s", error_trace)
             
             # Attempt degraded fallback to ensure UI block
             try:
@@ -833,23 +1711,26 @@ class DiscoveryAnalyzer:
                 metrics.setdefault("model", "fallback")
                 metrics.setdefault("token_usage", 0)
                 self._log_discovery_result("positioning_themes", "<exception_fallback>", degraded_model, metrics)
-                return degraded_model.dict(), metrics
+                return _dump_result(degraded_model), metrics
             except Exception:
                 self._log_discovery_error("positioning_themes", e, metrics)
                 return None, metrics
     
     @track_discovery_performance("key_messages")
-    def analyze_key_messages(self, text_content: str) -> Tuple[Optional[dict], Dict[str, Any]]:
+    @_coalesce_inflight("key_messages")
+    def analyze_key_messages(self, text_content: str, presanitized: bool = False,
+                             content_digest: Optional[str] = None) -> Tuple[Optional[dict], Dict[str, Any]]:
         """Analyze key messages using GPT-5 Responses API with JSON Schema (fallback to GPT-4o chat)."""
         start_time = time.time()
         metrics = {"key_name": "key_messages"}
         
         try:
             # Validate/sanitize; expect candidate lines, keep tighter budget
-            text_content = self._validate_and_sanitize_input(text_content, max_chars=12000)
+            text_content = self._validate_and_sanitize_input(text_content, max_chars=12000, presanitized=presanitized)
 
             # Cache lookup (prompt+schema aware)
-            content_fingerprint = self._compute_fingerprint("key_messages", text_content, KeyMessagesResult)
+            content_fingerprint = self._compute_fingerprint("key_messages", text_content, KeyMessagesResult,
+                                                           content_digest, presanitized)
             cached = self._load_cached_result("key_messages", content_fingerprint)
             if cached:
                 metrics["cache_hit"] = True
@@ -880,15 +1761,12 @@ class DiscoveryAnalyzer:
             )
             # Unified LLM call via LLMClient with schema enforcement on chat fallback
             try:
-                try:
-                    schema_dict = KeyMessagesResult.schema()
-                except Exception:
-                    schema_dict = KeyMessagesResult.model_json_schema()
                 raw_output, meta = self.llm_client.choose_and_call(
                     key_name="key_messages",
                     prompt=primary_prompt,
-                    schema=schema_dict,
+                    schema=_KEY_MESSAGES_SCHEMA,
                     enforce_schema=True,
+                    max_output_tokens=_MAX_OUTPUT_TOKENS["key_messages"],
                 )
                 metrics.update({
                     "api_used": meta.get("api_used"),
@@ -910,10 +1788,6 @@ class DiscoveryAnalyzer:
             if not result:
                 try:
                     # Enforce exact schema with Chat Completions repair
-                    try:
-                        schema_dict = KeyMessagesResult.schema()
-                    except Exception:
-                        schema_dict = KeyMessagesResult.model_json_schema()
                     repair_prompt = (
                         "You are a strict JSON schema formatter. Given the candidate lines below, output valid JSON that conforms to the KeyMessagesResult schema exactly.\n"
                         "Extract 3–5 key messages with fields: message (≤200), context (≤300), type (\"Tagline\"|\"Value Proposition\"), confidence (0–100).\n\n"
@@ -928,12 +1802,10 @@ class DiscoveryAnalyzer:
                             {"role": "system", "content": "Output only valid JSON matching the provided schema. No commentary."},
                             {"role": "user", "content": repair_prompt}
                         ],
-                        response_format={
-                            "type": "json_schema",
-                            "json_schema": {"name": "KeyMessagesResult", "schema": schema_dict, "strict": True}
-                        }
+                        response_format=_KEY_MESSAGES_RESPONSE_FORMAT,
+                        max_tokens=_MAX_OUTPUT_TOKENS["key_messages"]
                     )
-                    raw_output = (json.dumps(getattr(repair_resp.choices[0].message, "parsed"))
+                    raw_output = (_json_dumps_bytes(getattr(repair_resp.choices[0].message, "parsed")).decode()
                                    if getattr(repair_resp.choices[0].message, "parsed", None) is not None
                                    else repair_resp.choices[0].message.content)
                     result, repairs2 = self.validator.validate_with_repair(
@@ -972,34 +1844,26 @@ class DiscoveryAnalyzer:
             
             # Log for analysis
             self._log_discovery_result("key_messages", raw_output, result, metrics)
+            payload = _dump_result(result) if result else None  # Serialized once for cache + return
             if result:
-                self._save_cached_result("key_messages", content_fingerprint, result.dict())
+                self._save_cached_result("key_messages", content_fingerprint, payload)
             
-            return result.dict() if result else None, metrics
+            return payload, metrics
             
         except Exception as e:
             # More detailed error tracking
-            import traceback
-            error_trace = traceback.format_exc()
+            error_trace = _error_summary(e)
             
             # Check for specific error types
-            error_type = "unknown_error"
-            if "rate limit" in str(e).lower():
-                error_type = "rate_limit"
-            elif "insufficient_quota" in str(e).lower():
-                error_type = "quota_exceeded"
-            elif "json" in str(e).lower() or "parsing" in str(e).lower():
-                error_type = "json_parse_error"
-            elif "timeout" in str(e).lower():
-                error_type = "timeout"
+            error_type = _classify_error(e)
             
             metrics["error"] = error_type
             metrics["error_details"] = str(e)
             metrics["error_traceback"] = error_trace
             metrics["latency_ms"] = int((time.time() - start_time) * 1000)
             
-            print(f"[ERROR] key_messages analysis failed: {str(e)}")
-            print(f"[TRACEBACK] {error_trace}")
+            _log.error(f"key_messages analysis failed: {str(e)}")
+            _log.debug("%s", error_trace)
             
             self._log_discovery_error("key_messages", e, metrics)
             return None, metrics
@@ -1007,7 +1871,9 @@ class DiscoveryAnalyzer:
 # In discovery_integration.py
 
     @track_discovery_performance("tone_of_voice")
-    def analyze_tone_of_voice(self, text_content: str) -> Tuple[Optional[dict], Dict[str, Any]]:
+    @_coalesce_inflight("tone_of_voice")
+    def analyze_tone_of_voice(self, text_content: str, presanitized: bool = False,
+                              content_digest: Optional[str] = None) -> Tuple[Optional[dict], Dict[str, Any]]:
         """Analyze tone of voice using unified LLM client with fallbacks and schema repair."""
         
         start_time = time.time()
@@ -1016,8 +1882,9 @@ class DiscoveryAnalyzer:
         result = None
 
         try:
-            text_content = self._validate_and_sanitize_input(text_content, max_chars=4000)
-            content_fingerprint = self._compute_fingerprint("tone_of_voice", text_content, ToneOfVoiceResult)
+            text_content = self._validate_and_sanitize_input(text_content, max_chars=4000, presanitized=presanitized)
+            content_fingerprint = self._compute_fingerprint("tone_of_voice", text_content, ToneOfVoiceResult,
+                                                           content_digest, presanitized)
             cached = self._load_cached_result("tone_of_voice", content_fingerprint)
             if cached:
                 metrics["cache_hit"] = True
@@ -1049,15 +1916,12 @@ class DiscoveryAnalyzer:
             
             # Unified LLM call via LLMClient with schema enforcement on chat fallback
             try:
-                try:
-                    schema_dict = ToneOfVoiceResult.schema()
-                except Exception:
-                    schema_dict = ToneOfVoiceResult.model_json_schema()
                 raw_output, meta = self.llm_client.choose_and_call(
                     key_name="tone_of_voice",
                     prompt=primary_prompt,
-                    schema=schema_dict,
+                    schema=_TONE_SCHEMA,
                     enforce_schema=True,
+                    max_output_tokens=_MAX_OUTPUT_TOKENS["tone_of_voice"],
                 )
                 metrics.update({
                     "api_used": meta.get("api_used"),
@@ -1078,10 +1942,9 @@ class DiscoveryAnalyzer:
             if not result and raw_output:
                 self._debug_log_raw_output("tone_of_voice", "initial_validation_failed", raw_output, metrics)
                 repairs.append("initial_validation_failed")
-                print("[INFO] Initial validation for tone_of_voice failed, attempting schema repair.")
+                _log.info("Initial validation for tone_of_voice failed, attempting schema repair.")
                 metrics['api_used'] = (metrics.get('api_used') or "") + "+chat_schema_repair"
                 try:
-                    schema_dict = ToneOfVoiceResult.model_json_schema()
                     repair_prompt = f"You are a strict JSON schema formatter. Using only the snippets, produce valid JSON matching ToneOfVoiceResult.\n\nSnippets:\n{text_content}"
                     repair_resp = safe_openai_call(
                         self.llm_client.client,
@@ -1091,7 +1954,8 @@ class DiscoveryAnalyzer:
                             {"role": "system", "content": "Output only valid JSON matching the provided schema. No commentary."},
                             {"role": "user", "content": repair_prompt}
                         ],
-                        response_format={"type": "json_schema", "json_schema": {"name": "ToneOfVoiceResult", "schema": schema_dict, "strict": True}}
+                        response_format=_TONE_RESPONSE_FORMAT,
+                        max_tokens=_MAX_OUTPUT_TOKENS["tone_of_voice"]
                     )
                     raw_output = repair_resp.choices[0].message.content
                     result, repairs2 = self.validator.validate_with_repair(raw_output, ToneOfVoiceResult, "tone_of_voice")
@@ -1101,14 +1965,14 @@ class DiscoveryAnalyzer:
                         "model": getattr(repair_resp, 'model', 'gpt-4o-mini')
                     })
                 except Exception as repair_error:
-                    print(f"[ERROR] Schema repair for tone_of_voice failed: {repair_error}")
+                    _log.error(f"Schema repair for tone_of_voice failed: {repair_error}")
                     repairs.append(f"schema_repair_failed: {repair_error}")
 
             metrics.update({"validation_status": "success" if result else "failed", "repairs": repairs})
             
             # Stage 4: If all else fails, synthesize a degraded fallback result
             if not result:
-                print("[INFO] All analysis attempts for tone_of_voice failed. Synthesizing degraded fallback.")
+                _log.info("All analysis attempts for tone_of_voice failed. Synthesizing degraded fallback.")
                 metrics.update({"validation_status": "degraded_fallback", "degraded": True, "model": "fallback", "token_usage": 0})
                 try:
                     fallback_payload = {
@@ -1124,10 +1988,11 @@ class DiscoveryAnalyzer:
             
             metrics["latency_ms"] = int((time.time() - start_time) * 1000)
             self._log_discovery_result("tone_of_voice", raw_output, result, metrics)
+            payload = _dump_result(result) if result else None  # Serialized once for cache + return
             if result and not metrics.get("degraded"):
-                 self._save_cached_result("tone_of_voice", content_fingerprint, result.dict())
+                self._save_cached_result("tone_of_voice", content_fingerprint, payload)
             
-            return result.dict() if result else None, metrics
+            return payload, metrics
 
         except Exception as e:
             # Final catch-all to ensure we don't crash the worker
@@ -1138,45 +2003,34 @@ class DiscoveryAnalyzer:
     @track_discovery_performance("brand_elements")
     def analyze_brand_elements(self, screenshots: List[str], text_content: str) -> Tuple[Optional[dict], Dict[str, Any]]:
         """Analyze brand visual elements using GPT-5 vision capabilities (disk-cached by content+image)."""
-        from openai import OpenAI
-        import time
         start_time = time.time()
         metrics = {"key_name": "brand_elements", "phase": 2}
         
         try:
-            # Load environment variables if needed
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                try:
-                    from dotenv import load_dotenv
-                    load_dotenv()
-                    api_key = os.getenv("OPENAI_API_KEY")
-                except ImportError:
-                    pass
-            
-            if not api_key:
-                raise ValueError("OPENAI_API_KEY environment variable is required for Discovery analysis")
-            client = OpenAI(api_key=api_key)
-            prompt = DECONSTRUCTION_KEYS_PROMPTS["brand_elements"]["prompt"]
+            # Cache check first: a hit needs no API key resolution or client
             # Compute fingerprint from text summary + screenshot hashes (first 2 images)
             hasher = hashlib.sha256()
             hasher.update((text_content or "").encode())
             for s in (screenshots or [])[:2]:
                 if isinstance(s, str):
                     try:
-                        # normalize base64 (drop data: prefix)
-                        if s.startswith('data:image/'):
-                            s = s.split(',')[1]
-                        hasher.update(s.encode())
+                        # normalize base64 (drop data: prefix) and hash in 64 KiB slices so a
+                        # multi-MB screenshot is never encoded into one large bytes copy
+                        start = s.index(',') + 1 if s.startswith('data:image/') else 0
+                        for i in range(start, len(s), _HASH_CHUNK_CHARS):
+                            hasher.update(s[i:i + _HASH_CHUNK_CHARS].encode())
                     except Exception:
                         pass
-            content_fingerprint = hasher.hexdigest()
+            content_fingerprint = _key_digest(hasher)
             cached = self._load_cached_result("brand_elements", content_fingerprint)
             if cached:
                 metrics["cache_hit"] = True
                 metrics["latency_ms"] = 0
                 return cached, metrics
             
+            client = self.llm_client.client
+            prompt = DECONSTRUCTION_KEYS_PROMPTS["brand_elements"]["prompt"]
+            
             # Prepare screenshot context for GPT-5 vision
             screenshot_context = self._prepare_screenshot_context(screenshots, text_content)
             
@@ -1202,42 +2056,51 @@ class DiscoveryAnalyzer:
                     try:
                         # Handle base64 data (remove data:image prefix if present)
                         if screenshot_data.startswith('data:image/'):
-                            screenshot_data = screenshot_data.split(',')[1]
+                            screenshot_data = screenshot_data.split(',', 1)[1]
                         
-                        # Validate base64 format
-                        import base64
-                        base64.b64decode(screenshot_data, validate=True)
+                        # Validate by image magic in the first decoded bytes only; the
+                        # base64 payload is sent as-is, so a full decode would be wasted work
+                        mime = _image_mime(base64.b64decode(screenshot_data[:16]))
+                        if mime is None:
+                            raise ValueError("not a JPEG/PNG/WebP image")
                         
                         messages[1]["content"].append({
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/jpeg;base64,{screenshot_data}",
+                                "url": f"data:{mime};base64,{screenshot_data}",
                                 "detail": "high"  # High detail for brand analysis
                             }
                         })
                         valid_screenshots += 1
                         
                     except Exception as img_error:
-                        print(f"Skipping invalid screenshot {i}: {img_error}")
+                        _log.warning(f"Skipping invalid screenshot {i}: {img_error}")
                         continue
             
-            # GPT-5 vision call with fallback to GPT-4o
-            try:
-                response = safe_openai_call(
-                    client,
-                    timeout_seconds=120,
-                    model="gpt-5",
-                    messages=messages,
-                    response_format={"type": "json_object"}
-                )
-            except Exception:
-                print("[INFO] GPT-5 vision unavailable for brand_elements; falling back to gpt-4o")
+            # GPT-5 vision call with fallback to GPT-4o (skipped while the shared GPT-5 breaker is open)
+            response = None
+            if CircuitBreaker.allow(CircuitBreaker.GPT5):
+                try:
+                    response = safe_openai_call(
+                        client,
+                        timeout_seconds=120,
+                        model="gpt-5",
+                        messages=messages,
+                        response_format={"type": "json_object"},
+                        max_completion_tokens=_MAX_OUTPUT_TOKENS["brand_elements_gpt5"]
+                    )
+                    CircuitBreaker.record_result(CircuitBreaker.GPT5, success=True)
+                except Exception:
+                    CircuitBreaker.record_result(CircuitBreaker.GPT5, success=False)
+                    _log.info("GPT-5 vision unavailable for brand_elements; falling back to gpt-4o")
+            if response is None:
                 response = safe_openai_call(
                     client,
                     timeout_seconds=90,
                     model="gpt-4o",
                     messages=messages,
-                    response_format={"type": "json_object"}
+                    response_format={"type": "json_object"},
+                    max_tokens=_MAX_OUTPUT_TOKENS["brand_elements"]
                 )
             
             raw_output = response.choices[0].message.content
@@ -1292,16 +2155,17 @@ class DiscoveryAnalyzer:
                     metrics.setdefault("model", "fallback")
                     metrics.setdefault("token_usage", 0)
                     self._log_discovery_result("brand_elements", raw_output, degraded_model, metrics)
-                    return degraded_model.dict(), metrics
+                    return _dump_result(degraded_model), metrics
                 except Exception as _be_degrade_err:
                     metrics["degrade_error"] = str(_be_degrade_err)
             
             # Log for analysis
             self._log_discovery_result("brand_elements", raw_output, result, metrics)
+            payload = _dump_result(result) if result else None  # Serialized once for cache + return
             if result:
-                self._save_cached_result("brand_elements", content_fingerprint, result.dict())
+                self._save_cached_result("brand_elements", content_fingerprint, payload)
             
-            return result.dict() if result else None, metrics
+            return payload, metrics
             
         except Exception as e:
             metrics["error"] = str(e)
@@ -1340,7 +2204,7 @@ class DiscoveryAnalyzer:
                 metrics.setdefault("model", "fallback")
                 metrics.setdefault("token_usage", 0)
                 self._log_discovery_result("brand_elements", "<exception_fallback>", degraded_model, metrics)
-                return degraded_model.dict(), metrics
+                return _dump_result(degraded_model), metrics
             except Exception:
                 self._log_discovery_error("brand_elements", e, metrics)
                 return None, metrics
@@ -1348,8 +2212,6 @@ class DiscoveryAnalyzer:
     @track_discovery_performance("visual_text_alignment")
     def analyze_visual_text_alignment(self, positioning_themes: dict, brand_elements: dict) -> Tuple[Optional[dict], Dict[str, Any]]:
         """Analyze alignment between visual and text elements."""
-        from openai import OpenAI
-        import time
         start_time = time.time()
         metrics = {"key_name": "visual_text_alignment", "phase": 2}
         
@@ -1361,74 +2223,85 @@ class DiscoveryAnalyzer:
             }, {"key_name": "visual_text_alignment", "phase": 2, "skipped": True}
         
         try:
-            # Load environment variables if needed
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                try:
-                    from dotenv import load_dotenv
-                    load_dotenv()
-                    api_key = os.getenv("OPENAI_API_KEY")
-                except ImportError:
-                    pass
-            
-            if not api_key:
-                raise ValueError("OPENAI_API_KEY environment variable is required for Discovery analysis")
-            client = OpenAI(api_key=api_key)
+            client = self.llm_client.client
             
             # Format the positioning themes and brand elements for analysis
             themes_summary = self._format_themes_for_alignment(positioning_themes)
             elements_summary = self._format_elements_for_alignment(brand_elements)
+            alignment_input = themes_summary + "\n\n" + elements_summary
+            alignment_fingerprint = _content_digest(alignment_input)
             
-            # GPT-5 Responses API (guarded); fallback to GPT-4o
-            try:
-                if not _should_use_responses():
-                    raise Exception("Responses disabled by capability/env")
-                prompt_text = (
-                    "Task: Assess whether visuals support the core positioning.\n\n"
-                    "Produce: alignment (\"Yes\"|\"No\") and justification (≤1000 chars) referencing specific visual cues and specific themes.\n\n"
-                    "Inputs:\n"
-                    f"Positioning themes (top 3):\n{themes_summary}\n\n"
-                    f"Brand elements (visual summary):\n{elements_summary}"
-                )
-                tokens_needed = self._estimate_tokens(themes_summary + "\n" + elements_summary)
-                if not self._acquire_budget(tokens_needed):
-                    raise TimeoutError("LLM budget unavailable")
-                response = safe_responses_call(
-                    client,
-                    timeout_seconds=self._adaptive_timeout(tokens_needed, cap=90),
-                    model="gpt-5",
-                    input=prompt_text,
-                    reasoning={"effort": "minimal"},
-                    text={"verbosity": "low"}
-                )
-                raw_output = None
-                if hasattr(response, 'output') and isinstance(response.output, list):
-                    for item in response.output:
-                        if hasattr(item, 'content') and item.content:
-                            for c in item.content:
-                                if getattr(c, 'type', '') == 'output_text' and hasattr(c, 'text'):
-                                    raw_output = c.text
-                                    break
-                        if raw_output:
-                            break
-                if not raw_output and hasattr(response, 'text') and isinstance(response.text, str):
-                    raw_output = response.text
-                if not raw_output:
-                    raise Exception("Failed to extract JSON from GPT-5 response")
-                metrics["api_used"] = "responses_api"
-                metrics["model"] = "gpt-5"
-                self._release_budget()
-            except Exception:
-                self._release_budget()
+            # Exact cache first, then near-duplicate inputs via embeddings
+            cached = self._load_cached_result("visual_text_alignment", alignment_fingerprint)
+            if cached:
+                metrics["cache_hit"] = True
+                metrics["latency_ms"] = int((time.time() - start_time) * 1000)
+                return cached, metrics
+            # Opt-in (DISCOVERY_SEMANTIC_CACHE; costs an embeddings round-trip), and only when the
+            # gpt-5 minimal-effort path will run; the gpt-4o fallback samples at default temperature
+            embedding = None
+            use_semantic = _FLAGS.semantic_cache and _responses_available("visual_text_alignment")
+            if use_semantic:
+                cached, embedding, similarity = self._semantic_lookup(alignment_input)
+                if cached:
+                    # Not written back under this fingerprint: the result was computed for a neighbour
+                    metrics.update({"cache_hit": True, "semantic_cache_hit": True,
+                                    "semantic_similarity": round(similarity, 4),
+                                    "latency_ms": int((time.time() - start_time) * 1000)})
+                    return cached, metrics
+            
+            # GPT-5 Responses API (capability known and key breaker closed); fallback to GPT-4o
+            prompt_text = (
+                "Task: Assess whether visuals support the core positioning.\n\n"
+                "Produce: alignment (\"Yes\"|\"No\") and justification (≤1000 chars) referencing specific visual cues and specific themes.\n\n"
+                "Inputs:\n"
+                f"Positioning themes (top 3):\n{themes_summary}\n\n"
+                f"Brand elements (visual summary):\n{elements_summary}"
+            )
+            raw_output = None
+            tokens_needed = self._estimate_tokens(alignment_input)  # Already joined for the cache key
+            if _responses_available("visual_text_alignment"):
+                if self._acquire_budget(tokens_needed):
+                    if not _claim_responses("visual_text_alignment"):
+                        # Another caller holds the half-open probe; free the slot and use gpt-4o
+                        self._release_budget()
+                    else:
+                        call_started = time.time()
+                        call_error = None
+                        try:
+                            response = safe_responses_call(
+                                client,
+                                timeout_seconds=self._adaptive_timeout(tokens_needed, cap=90),
+                                model="gpt-5",
+                                input=prompt_text,
+                                reasoning={"effort": "minimal"},
+                                text={"verbosity": "low"},
+                                max_output_tokens=_MAX_OUTPUT_TOKENS["visual_text_alignment_gpt5"],
+                                stream=True
+                            )
+                            raw_output = response.output_text or None
+                            if not raw_output:
+                                raise Exception("Failed to extract JSON from GPT-5 response")
+                            metrics["api_used"] = "responses_api"
+                            metrics["model"] = "gpt-5"
+                            _record_responses_result("visual_text_alignment", success=True)
+                        except Exception as e:
+                            call_error = e
+                            _record_responses_result("visual_text_alignment", success=False)
+                            raw_output = None
+                        finally:
+                            self._release_budget(latency_s=time.time() - call_started, error=call_error)
+            if raw_output is None:
                 response = safe_openai_call(
                     client,
-                    timeout_seconds=self._adaptive_timeout(self._estimate_tokens(themes_summary + elements_summary), cap=90),
+                    timeout_seconds=self._adaptive_timeout(tokens_needed, cap=90),
                     model="gpt-4o",
                     messages=[
                         {"role": "system", "content": "You are a senior brand strategist evaluating brand consistency. Output only valid JSON."},
                         {"role": "user", "content": prompt_text}
                     ],
-                    response_format={"type": "json_object"}
+                    response_format={"type": "json_object"},
+                    max_tokens=_MAX_OUTPUT_TOKENS["visual_text_alignment"]
                 )
                 raw_output = response.choices[0].message.content
                 metrics["token_usage"] = response.usage.total_tokens if hasattr(response, 'usage') else 0
@@ -1458,19 +2331,21 @@ class DiscoveryAnalyzer:
                     metrics.setdefault("model", "fallback")
                     metrics.setdefault("token_usage", 0)
                     self._log_discovery_result("visual_text_alignment", raw_output, degraded_model, metrics)
-                    alignment_fingerprint = hashlib.sha256((themes_summary + "\n\n" + elements_summary).encode()).hexdigest()
-                    self._save_cached_result("visual_text_alignment", alignment_fingerprint, degraded_model.dict())
-                    return degraded_model.dict(), metrics
+                    payload = _dump_result(degraded_model)
+                    self._save_cached_result("visual_text_alignment", alignment_fingerprint, payload)
+                    return payload, metrics
                 except Exception:
                     pass
             
             # Log for analysis
             self._log_discovery_result("visual_text_alignment", raw_output, result, metrics)
+            payload = _dump_result(result) if result else None  # Serialized once for cache + return
             if result:
-                alignment_fingerprint = hashlib.sha256((themes_summary + "\n\n" + elements_summary).encode()).hexdigest()
-                self._save_cached_result("visual_text_alignment", alignment_fingerprint, result.dict())
+                self._save_cached_result("visual_text_alignment", alignment_fingerprint, payload)
+                if embedding is not None and metrics.get("api_used") == "responses_api":
+                    self._semantic_store(alignment_fingerprint, embedding, payload)
             
-            return result.dict() if result else None, metrics
+            return payload, metrics
             
         except Exception as e:
             metrics["error"] = str(e)
@@ -1487,7 +2362,7 @@ class DiscoveryAnalyzer:
                 metrics.setdefault("model", "fallback")
                 metrics.setdefault("token_usage", 0)
                 self._log_discovery_result("visual_text_alignment", "<exception_fallback>", degraded_model, metrics)
-                return degraded_model.dict(), metrics
+                return _dump_result(degraded_model), metrics
             except Exception:
                 self._log_discovery_error("visual_text_alignment", e, metrics)
                 return None, metrics
@@ -1560,57 +2435,42 @@ class DiscoveryAnalyzer:
         
         return "BRAND ELEMENTS:\n" + "\n".join(parts) if parts else "BRAND ELEMENTS: Analysis incomplete"
     
+    # Text key -> list field whose items carry a confidence score
+    _CONFIDENCE_ITEM_FIELDS = {
+        'positioning_themes': 'themes',
+        'key_messages': 'key_messages',
+        'tone_of_voice': 'tone_descriptors',
+    }
+
+    # Confidence boosts: coherence >= 4 -> +5, >= 3 -> +3; alignment Yes -> +8, No -> -5
+    _ALIGNMENT_BOOST = {'Yes': 8, 'No': -5}
+
     def enhance_confidence_with_visual_evidence(self, text_results: dict, visual_results: dict, alignment_results: dict) -> dict:
         """Enhance confidence scores based on visual-text alignment."""
         enhanced_results = {}
         
+        # Boost factors depend only on the visual/alignment results, so compute them once
+        coherence = (visual_results or {}).get('coherence_score') or 0
+        visual_support_boost = 5 if coherence >= 4 else 3 if coherence >= 3 else 0
+        alignment_boost = self._ALIGNMENT_BOOST.get((alignment_results or {}).get('alignment'), 0)
+        
+        total_boost = visual_support_boost + alignment_boost
+        visual_support = visual_support_boost > 0
+        alignment_confirmed = alignment_boost > 0
+        
         for key, result in text_results.items():
-            if not result or key not in ['positioning_themes', 'key_messages', 'tone_of_voice']:
+            items_field = self._CONFIDENCE_ITEM_FIELDS.get(key)
+            if not result or items_field is None:
                 enhanced_results[key] = result
                 continue
                 
             enhanced_result = result.copy()
             
-            # Base confidence boost factors
-            visual_support_boost = 0
-            alignment_boost = 0
-            
-            # Check if visual evidence supports text analysis  
-            if visual_results and visual_results.get('coherence_score', 0) >= 4:
-                visual_support_boost = 5  # +5% for high visual coherence
-            elif visual_results and visual_results.get('coherence_score', 0) >= 3:
-                visual_support_boost = 3  # +3% for medium visual coherence
-            
-            # Check visual-text alignment
-            if alignment_results and alignment_results.get('alignment') == 'Yes':
-                alignment_boost = 8  # +8% for confirmed alignment
-            elif alignment_results and alignment_results.get('alignment') == 'No':
-                alignment_boost = -5  # -5% for misalignment
-            
             # Apply boosts to individual items
-            if key == 'positioning_themes' and 'themes' in enhanced_result:
-                for theme in enhanced_result['themes']:
-                    original_confidence = theme.get('confidence', 0)
-                    boosted_confidence = min(100, original_confidence + visual_support_boost + alignment_boost)
-                    theme['confidence'] = boosted_confidence
-                    theme['visual_support'] = visual_support_boost > 0
-                    theme['alignment_confirmed'] = alignment_boost > 0
-                    
-            elif key == 'key_messages' and 'key_messages' in enhanced_result:
-                for message in enhanced_result['key_messages']:
-                    original_confidence = message.get('confidence', 0)
-                    boosted_confidence = min(100, original_confidence + visual_support_boost + alignment_boost)
-                    message['confidence'] = boosted_confidence
-                    message['visual_support'] = visual_support_boost > 0
-                    message['alignment_confirmed'] = alignment_boost > 0
-                    
-            elif key == 'tone_of_voice' and 'tone_descriptors' in enhanced_result:
-                for tone in enhanced_result['tone_descriptors']:
-                    original_confidence = tone.get('confidence', 0)
-                    boosted_confidence = min(100, original_confidence + visual_support_boost + alignment_boost)
-                    tone['confidence'] = boosted_confidence
-                    tone['visual_support'] = visual_support_boost > 0
-                    tone['alignment_confirmed'] = alignment_boost > 0
+            for item in enhanced_result.get(items_field) or ():
+                item['confidence'] = min(100, item.get('confidence', 0) + total_boost)
+                item['visual_support'] = visual_support
+                item['alignment_confirmed'] = alignment_confirmed
             
             enhanced_results[key] = enhanced_result
         
@@ -1619,19 +2479,17 @@ class DiscoveryAnalyzer:
     def _log_discovery_result(self, key_name: str, raw_output: str, validated_result: Any, metrics: dict):
         """Log Discovery analysis results for monitoring and debugging."""
         # Attach a trace id for correlating logs across components
-        import uuid as _uuid
-        trace_id = metrics.get("trace_id") or _uuid.uuid4().hex[:12]
+        trace_id = metrics.get("trace_id") or uuid.uuid4().hex[:12]
         metrics["trace_id"] = trace_id
 
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time.time(),
             "scan_id": self.scan_id,
             "key_name": key_name,
             "model_id": metrics.get("model", "unknown"),
             "prompt_version": PROMPT_VERSION,
-            "prompt_hash": hashlib.sha256(
-                DECONSTRUCTION_KEYS_PROMPTS[key_name]["prompt"].encode()
-            ).hexdigest()[:8],
+            # Paths that send a prompt other than the key's template record its hash in metrics
+            "prompt_hash": metrics.get("prompt_hash") or _prompt_hash(key_name),
             "latency_ms": metrics.get("latency_ms"),
             "token_usage": metrics.get("token_usage"),
             "validation_status": metrics.get("validation_status"),
@@ -1641,21 +2499,15 @@ class DiscoveryAnalyzer:
         }
         
         # Log to file (in production, this would go to your logging service)
-        log_file = os.path.join(
-            os.getenv("PERSISTENT_DATA_DIR", "/tmp"),
-            "discovery_analysis.jsonl"
-        )
-        with open(log_file, "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        _append_jsonl(_RESULT_LOG, log_entry)
     
     def _log_discovery_error(self, key_name: str, error: Exception, metrics: dict):
         """Log Discovery analysis errors."""
-        import uuid as _uuid
-        trace_id = metrics.get("trace_id") or _uuid.uuid4().hex[:12]
+        trace_id = metrics.get("trace_id") or uuid.uuid4().hex[:12]
         metrics["trace_id"] = trace_id
 
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time.time(),
             "scan_id": self.scan_id,
             "key_name": key_name,
             "prompt_version": PROMPT_VERSION,
@@ -1665,12 +2517,7 @@ class DiscoveryAnalyzer:
             "metrics": metrics
         }
         
-        log_file = os.path.join(
-            os.getenv("PERSISTENT_DATA_DIR", "/tmp"),
-            "discovery_errors.jsonl"
-        )
-        with open(log_file, "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        _append_jsonl(_ERROR_LOG, log_entry)
 
     def _debug_log_raw_output(self, key_name: str, stage: str, raw_output: str, metrics: dict):
         """Detailed debug log for raw model output when validation fails or repairs applied.
@@ -1678,12 +2525,11 @@ class DiscoveryAnalyzer:
         Truncates raw output to protect logs. Intended for troubleshooting only.
         """
         try:
-            import uuid as _uuid
-            trace_id = metrics.get("trace_id") or _uuid.uuid4().hex[:12]
+            trace_id = metrics.get("trace_id") or uuid.uuid4().hex[:12]
             metrics["trace_id"] = trace_id
 
             debug_entry = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": time.time(),
                 "scan_id": self.scan_id,
                 "key_name": key_name,
                 "stage": stage,
@@ -1695,12 +2541,7 @@ class DiscoveryAnalyzer:
                 "error_details": metrics.get("error_details"),
                 "raw_output_truncated": str(raw_output)[:2000] if raw_output else None
             }
-            log_file = os.path.join(
-                os.getenv("PERSISTENT_DATA_DIR", "/tmp"),
-                "discovery_debug.jsonl"
-            )
-            with open(log_file, "a") as f:
-                f.write(json.dumps(debug_entry) + "\n")
+            _append_jsonl(_DEBUG_LOG, debug_entry)
         except Exception:
             pass
 
@@ -1709,18 +2550,24 @@ def enhance_scanner_for_discovery(existing_run_full_scan_stream):
     """
     Decorator to enhance existing run_full_scan_stream function with Discovery Mode.
     This allows us to add Discovery Mode without modifying the core scanner.py file.
+    When Discovery is switched off globally the original function is returned unwrapped.
     """
+    if not FeatureFlags.is_discovery_enabled():
+        return existing_run_full_scan_stream
+
     def enhanced_scan_stream(url: str, cache: dict, preferred_lang: str = 'en', 
                             scan_id: str = None, mode: str = 'diagnosis'):
         
-        # If diagnosis mode or discovery disabled, use original function
-        if mode == 'diagnosis' or not FeatureFlags.is_discovery_enabled():
+        # Diagnosis scans go straight to the original function; flags only matter for Discovery
+        if mode == 'diagnosis':
+            yield from existing_run_full_scan_stream(url, cache, preferred_lang, scan_id)
+            return
+        if not FeatureFlags.is_discovery_enabled():
             yield from existing_run_full_scan_stream(url, cache, preferred_lang, scan_id)
             return
         
         # Discovery Mode logic
         if not scan_id:
-            import uuid
             scan_id = str(uuid.uuid4())
         
         # Track scan start
@@ -1747,15 +2594,11 @@ class DiscoveryFeedbackHandler:
         try:
             # Validate feedback
             validated_feedback = feedback.dict()
+            if isinstance(validated_feedback.get("timestamp"), datetime):
+                validated_feedback["timestamp"] = validated_feedback["timestamp"].timestamp()
             
             # Log to persistent storage
-            feedback_file = os.path.join(
-                os.getenv("PERSISTENT_DATA_DIR", "/tmp"),
-                "discovery_feedback.jsonl"
-            )
-            
-            with open(feedback_file, "a") as f:
-                f.write(json.dumps(validated_feedback, default=str) + "\n")
+            _append_jsonl(_FEEDBACK_LOG, validated_feedback)
             
             # Track metrics (would integrate with Mixpanel/Amplitude here)
             DiscoveryFeedbackHandler._track_feedback_metrics(validated_feedback)
@@ -1763,7 +2606,7 @@ class DiscoveryFeedbackHandler:
             return True
             
         except Exception as e:
-            print(f"Failed to record Discovery feedback: {e}")
+            _log.warning(f"Failed to record Discovery feedback: {e}")
             return False
     
     @staticmethod
@@ -1790,7 +2633,7 @@ class DiscoveryMetrics:
         metrics = {
             "scan_id": scan_id,
             "mode": mode,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time.time(),
             "performance": {
                 "total_duration_ms": performance.get("total_duration"),
                 "per_key_duration_ms": performance.get("key_durations", {}),
@@ -1805,12 +2648,7 @@ class DiscoveryMetrics:
         }
         
         # Log metrics (would send to analytics platform)
-        metrics_file = os.path.join(
-            os.getenv("PERSISTENT_DATA_DIR", "/tmp"),
-            "discovery_metrics.jsonl"
-        )
-        with open(metrics_file, "a") as f:
-            f.write(json.dumps(metrics) + "\n")
+        _append_jsonl(_METRICS_LOG, metrics)
         
         return metrics
     
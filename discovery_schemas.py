@@ -12,6 +12,13 @@ from typing import List, Optional, Dict, Any, Literal
 import json
 from datetime import datetime
 
+try:
+    import orjson  # type: ignore
+    _json_loads = orjson.loads
+except Exception:
+    orjson = None  # Optional; fall back to stdlib json
+    _json_loads = json.loads
+
 # Pydantic v2 compatible model configuration
 # Forbids extra fields to ensure strict schema adherence required by OpenAI's API
 strict_config = ConfigDict(extra='forbid')
@@ -257,6 +264,11 @@ class SchemaValidator:
         except Exception:
             return data
 
+    # Domain-specific payload normalization applied before validation, per schema class
+    _PAYLOAD_NORMALIZERS = {
+        ToneOfVoiceResult: _normalize_tone_of_voice_payload,
+    }
+
     def validate_with_repair(self, raw_json: str, schema_class, key_name: str) -> tuple[Optional[BaseModel], list[str]]:
         """Attempt to validate JSON against schema with auto-repair. Returns (validated_model|None, repairs)."""
         repairs: list[str] = []
@@ -264,7 +276,7 @@ class SchemaValidator:
         def _extract_json(text: str):
             """Extract first JSON object or array from a possibly fenced/verbose string."""
             try:
-                return json.loads(text), []
+                return _json_loads(text), []
             except Exception:
                 pass
             s = text.strip()
@@ -277,7 +289,7 @@ class SchemaValidator:
                     if close != -1:
                         s2 = s2[:close]
                     try:
-                        return json.loads(s2), ["stripped_code_fence"]
+                        return _json_loads(s2), ["stripped_code_fence"]
                     except Exception:
                         s = s2
             # Find first balanced JSON object/array
@@ -311,12 +323,21 @@ class SchemaValidator:
                                 if not stack:
                                     candidate = s[idx:i+1]
                                     try:
-                                        return json.loads(candidate), ["extracted_subjson"]
+                                        return _json_loads(candidate), ["extracted_subjson"]
                                     except Exception:
                                         break
                     i += 1
             return None, ["json_parse_failed"]
 
+        # Fast path: well-formed output is parsed and validated in one pydantic-core
+        # pass with no intermediate dict. Schemas with a payload normalizer skip it.
+        normalize = SchemaValidator._PAYLOAD_NORMALIZERS.get(schema_class)
+        if isinstance(raw_json, str) and normalize is None:
+            try:
+                return schema_class.model_validate_json(raw_json), repairs
+            except Exception:
+                pass
+
         data = None
         # Try direct, then fence/substring extraction
         if isinstance(raw_json, (dict, list)):
@@ -331,19 +352,19 @@ class SchemaValidator:
                 return None, repairs
         
         # Domain-specific normalization
-        if schema_class.__name__ == 'ToneOfVoiceResult':
-            data = SchemaValidator._normalize_tone_of_voice_payload(data)
+        if normalize is not None:
+            data = normalize(data)
 
         # First validation attempt
         try:
-            model = schema_class(**data)
+            model = schema_class.model_validate(data)
             return model, repairs
         except Exception as e:
             repairs.append(f"Initial validation error: {e}")
         
         # Selective list cleanup
-        if hasattr(schema_class, '__fields__'):
-            for field_name, field_info in schema_class.__fields__.items():
+        if isinstance(data, dict):
+            for field_name in schema_class.model_fields:
                 if field_name in data and isinstance(data[field_name], list):
                     items = data[field_name]
                     if isinstance(items, list):
@@ -351,7 +372,7 @@ class SchemaValidator:
 
         # Final attempt
         try:
-            model = schema_class(**data)
+            model = schema_class.model_validate(data)
             return model, repairs
         except Exception as e:
             repairs.append(f"Final validation failed: {e}")
@@ -5,7 +5,7 @@ Unifies:
 - Capability probe (Responses API) with fast circuit breaker per key
 - Fallback chain: gpt-5 (Responses) -> gpt-4o (Chat) -> gpt-4o-mini (Chat)
 - Token estimation via tiktoken (fallback to len/4)
-- Safe timeouts via thread executor wrappers
+- Safe timeouts via a shared thread executor
 
 Returns (raw_output, meta) where meta includes: api_used, model, token_usage, breaker_open
 """
@@ -13,10 +13,16 @@ Returns (raw_output, meta) where meta includes: api_used, model, token_usage, br
 from __future__ import annotations
 
 import os
+import re
 import time
 import json
+import random
+import hashlib
+import logging
+import functools
+import threading
 import concurrent.futures
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List, NamedTuple
 
 try:
     import tiktoken  # type: ignore
@@ -24,13 +30,231 @@ except Exception:
     tiktoken = None  # Optional; we fallback if unavailable
 
 
+# Shares the queue-backed handler that discovery_integration installs
+_log = logging.getLogger("discovery")
+
+# Shared worker pool for timeout-guarded LLM calls. A timed-out call cannot be
+# interrupted, so we stop waiting and let the worker finish in the background
+# (the SDK-level timeout bounds it) instead of spawning a thread per request.
+LLM_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.getenv("DISCOVERY_LLM_POOL", "8")),
+    thread_name_prefix="llm",
+)
+
+# Chat Completions calls (the gpt-4o fallbacks and repairs) get their own pool, so
+# gpt-5 Responses calls abandoned at their deadline cannot occupy every worker
+# and starve the fallback that is meant to replace them.
+FALLBACK_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.getenv("DISCOVERY_FALLBACK_POOL", "4")),
+    thread_name_prefix="llm-fallback",
+)
+
+# Process-wide OpenAI clients keyed by API key, so every Discovery key and
+# analyzer instance reuses one HTTP connection pool (and its TLS sessions).
+_SHARED_OPENAI_CLIENTS: Dict[str, Any] = {}
+_SHARED_OPENAI_LOCK = threading.Lock()
+
+
+def get_shared_openai_client(api_key: str):
+    """Get or create the shared OpenAI client for api_key."""
+    with _SHARED_OPENAI_LOCK:
+        client = _SHARED_OPENAI_CLIENTS.get(api_key)
+        if client is None:
+            import httpx
+            from openai import OpenAI  # Local import to avoid hard dep at import time
+            client = OpenAI(
+                api_key=api_key,
+                timeout=180.0,
+                max_retries=1,  # Our wrappers retry transient errors with jitter; avoid compounding
+                http_client=httpx.Client(
+                    event_hooks={"response": [_track_rate_limit_headers]},
+                    timeout=httpx.Timeout(180.0, connect=5.0),
+                    limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+                ),
+            )
+            _SHARED_OPENAI_CLIENTS[api_key] = client
+        return client
+
+
+# SDK exception class names worth retrying (matched by name so openai stays a lazy import)
+_TRANSIENT_ERROR_NAMES = frozenset({
+    "APITimeoutError", "APIConnectionError", "RateLimitError", "InternalServerError",
+})
+_RESET_PART_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_RESET_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def is_transient_llm_error(exc: BaseException) -> bool:
+    """True for errors worth retrying: timeouts, dropped connections, 429s and 5xx."""
+    if isinstance(exc, (TimeoutError, concurrent.futures.TimeoutError, ConnectionError)):
+        return True
+    if type(exc).__name__ in _TRANSIENT_ERROR_NAMES:
+        return True
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+def _parse_reset(value: str) -> float:
+    """Seconds in an x-ratelimit-reset-* value such as '6m0s', '1.5s' or '20ms'."""
+    return sum(float(n) * _RESET_UNITS[u] for n, u in _RESET_PART_RE.findall(value))
+
+
+def _retry_after_seconds(exc: Optional[BaseException]) -> float:
+    """Server-requested wait from Retry-After / x-ratelimit-reset-* headers, else 0."""
+    return _retry_after_from_headers(getattr(getattr(exc, "response", None), "headers", None))
+
+
+def _retry_after_from_headers(headers) -> float:
+    if not headers:
+        return 0.0
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass  # HTTP-date form; fall through to the reset headers
+    waits = []
+    for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(name)
+        if value:
+            waits.append(_parse_reset(value))
+    return max(waits, default=0.0)
+
+
+class RateLimitTracker:
+    """
+    Tracks the provider's x-ratelimit-* headers from every response so callers can
+    pause before a request that would likely be rejected, instead of after a 429.
+    """
+
+    def __init__(self, headroom: float = 0.1, max_pause: float = 30.0):
+        self.headroom = headroom  # Pause when remaining < headroom * limit
+        self.max_pause = max_pause
+        self._pause_until = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, status_code: int, headers) -> None:
+        pause = 0.0
+        if status_code == 429:
+            pause = _retry_after_from_headers(headers)
+        else:
+            for kind in ("requests", "tokens"):
+                try:
+                    limit = float(headers.get(f"x-ratelimit-limit-{kind}") or 0)
+                    remaining = float(headers.get(f"x-ratelimit-remaining-{kind}") or limit)
+                except (TypeError, ValueError):
+                    continue
+                if limit and remaining < self.headroom * limit:
+                    pause = max(pause, _parse_reset(headers.get(f"x-ratelimit-reset-{kind}") or ""))
+        if pause > 0:
+            with self._lock:
+                self._pause_until = max(self._pause_until, time.time() + min(pause, self.max_pause))
+
+    def wait_if_throttled(self) -> None:
+        delay = self._pause_until - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+
+RATE_LIMITS = RateLimitTracker()
+
+
+def _track_rate_limit_headers(response) -> None:
+    """httpx response hook: feed every OpenAI response's headers to RATE_LIMITS."""
+    try:
+        RATE_LIMITS.update(response.status_code, response.headers)
+    except Exception:
+        pass
+
+
+def backoff_delay(retry: int, exc: Optional[BaseException] = None, cap: float = 30.0) -> float:
+    """Jittered exponential backoff (0.5x-1.5x of 2**retry, capped), never shorter than Retry-After."""
+    base = min(2 ** retry, cap)
+    delay = random.uniform(base * 0.5, base * 1.5)
+    return max(delay, min(_retry_after_seconds(exc), 2 * cap))
+
+
+_DOTENV_LOADED = False
+
+
+def resolve_openai_api_key() -> Optional[str]:
+    """OPENAI_API_KEY from the environment, parsing .env at most once per process."""
+    global _DOTENV_LOADED
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key and not _DOTENV_LOADED:
+        _DOTENV_LOADED = True
+        try:
+            from dotenv import load_dotenv
+            load_dotenv()
+        except Exception:
+            pass
+        api_key = os.getenv("OPENAI_API_KEY")
+    return api_key
+
+
+# Responses capability probe outcome persisted across restarts, keyed by a short
+# hash of the API key, so a fresh worker does not pay for the "ping" call again.
+_CAPABILITY_NEGATIVE_TTL = 3600  # A failed probe may be a transient outage; re-check sooner
+
+
+def _capability_cache_path() -> str:
+    return os.path.join(os.getenv("PERSISTENT_DATA_DIR", "/tmp"), "responses_capability.json")
+
+
+def _capability_ttl() -> int:
+    return int(os.getenv("DISCOVERY_RESPONSES_PROBE_TTL", "86400"))
+
+
+def _api_key_hash(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+def load_persisted_capability(api_key: str) -> Optional[bool]:
+    """Cached probe result for api_key, or None when absent, stale or disabled (TTL <= 0)."""
+    ttl = _capability_ttl()
+    if ttl <= 0:
+        return None
+    try:
+        with open(_capability_cache_path(), "r") as f:
+            entry = json.load(f)
+        if entry.get("api_key_hash") != _api_key_hash(api_key):
+            return None
+        capable = bool(entry.get("capable"))
+        max_age = ttl if capable else min(ttl, _CAPABILITY_NEGATIVE_TTL)
+        if time.time() - float(entry.get("ts", 0)) >= max_age:
+            return None
+        return capable
+    except Exception:
+        return None
+
+
+def save_persisted_capability(api_key: str, capable: bool) -> None:
+    if _capability_ttl() <= 0:
+        return
+    path = _capability_cache_path()
+    try:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"capable": capable, "ts": time.time(), "api_key_hash": _api_key_hash(api_key)}, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        _log.warning(f"Failed to persist Responses capability: {e}")
+
+
 class CircuitBreaker:
     """
     Simple in-memory circuit breaker per key_name.
     - Open after N consecutive failures; remain open for cooldown seconds
     - When open, primary (gpt-5) is skipped and we go straight to chat fallback
+    - After the cooldown it is half-open: allow() admits one probe call, and the
+      probe's result closes or re-opens it (others stay blocked meanwhile). A caller
+      that takes the probe but then skips the call must release() it.
+    The GPT5 key is shared by every analysis, so an outage trips it once for all.
     """
+    GPT5 = "gpt-5"
     _state: Dict[str, Dict[str, Any]] = {}
+    _lock = threading.Lock()
 
     @classmethod
     def _now(cls) -> float:
@@ -38,16 +262,18 @@ class CircuitBreaker:
 
     @classmethod
     def record_result(cls, key: str, success: bool) -> None:
-        st = cls._state.setdefault(key, {"failures": 0, "open_until": 0.0})
-        if success:
-            st["failures"] = 0
-            st["open_until"] = 0.0
-        else:
-            st["failures"] += 1
-            threshold = int(os.getenv("DISCOVERY_CB_THRESHOLD", "3"))
-            if st["failures"] >= threshold:
-                cooldown = int(os.getenv("DISCOVERY_CB_COOLDOWN_SECONDS", "600"))
-                st["open_until"] = cls._now() + cooldown
+        with cls._lock:
+            st = cls._state.setdefault(key, {"failures": 0, "open_until": 0.0})
+            st["probing"] = False
+            if success:
+                st["failures"] = 0
+                st["open_until"] = 0.0
+            else:
+                st["failures"] += 1
+                threshold = int(os.getenv("DISCOVERY_CB_THRESHOLD", "3"))
+                if st["failures"] >= threshold:
+                    cooldown = int(os.getenv("DISCOVERY_CB_COOLDOWN_SECONDS", "600"))
+                    st["open_until"] = cls._now() + cooldown
 
     @classmethod
     def is_open(cls, key: str) -> bool:
@@ -58,44 +284,135 @@ class CircuitBreaker:
             return False
         return True
 
+    @classmethod
+    def allow(cls, key: str) -> bool:
+        """True if a call may go ahead; in half-open state only the first caller is admitted."""
+        return cls._admit(key) is not None
+
+    @classmethod
+    def _admit(cls, key: str) -> Optional[bool]:
+        """None if refused, True if the half-open probe slot was taken, False if simply closed."""
+        with cls._lock:
+            st = cls._state.get(key)
+            if not st:
+                return False
+            now = cls._now()
+            if st["open_until"] > now:
+                return None
+            if st["failures"] >= int(os.getenv("DISCOVERY_CB_THRESHOLD", "3")):
+                # Half-open: block others until this probe reports (or its window lapses)
+                st["open_until"] = now + int(os.getenv("DISCOVERY_CB_PROBE_SECONDS", "120"))
+                st["probing"] = True
+                return True
+            return False
+
+    @classmethod
+    def release(cls, key: str) -> None:
+        """Return an unused half-open probe slot taken by allow() (no-op otherwise)."""
+        with cls._lock:
+            st = cls._state.get(key)
+            if st and st.get("probing"):
+                st["probing"] = False
+                st["open_until"] = 0.0
+
+    @classmethod
+    def allow_all(cls, *keys: str) -> bool:
+        """allow() for every key, or none: probe slots taken here are released on refusal."""
+        probes: List[str] = []
+        for key in keys:
+            admitted = cls._admit(key)
+            if admitted is None:
+                for k in probes:
+                    cls.release(k)
+                return False
+            if admitted:
+                probes.append(key)
+        return True
+
 
 def _safe_chat_call(client, timeout_seconds: int = 60, max_retries: int = 1, **kwargs):
+    # SDK-level timeout too, so a worker abandoned at the deadline is freed promptly
+    # instead of holding a FALLBACK_EXECUTOR slot until the client-wide 180s timeout
+    kwargs.setdefault("timeout", timeout_seconds)
     last_error = None
     for retry in range(max_retries + 1):
         if retry > 0:
-            time.sleep(min(2 ** retry, 8))
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
-            fut = ex.submit(client.chat.completions.create, **kwargs)
-            try:
-                resp = fut.result(timeout=timeout_seconds)
-                return resp
-            except concurrent.futures.TimeoutError:
-                fut.cancel()
-                last_error = TimeoutError(f"Chat call timed out after {timeout_seconds}s")
-            except Exception as e:
+            time.sleep(backoff_delay(retry, last_error, cap=8))
+        RATE_LIMITS.wait_if_throttled()
+        fut = FALLBACK_EXECUTOR.submit(client.chat.completions.create, **kwargs)
+        try:
+            resp = fut.result(timeout=timeout_seconds)
+            return resp
+        except concurrent.futures.TimeoutError:
+            fut.cancel()
+            last_error = TimeoutError(f"Chat call timed out after {timeout_seconds}s")
+        except Exception as e:
+            if retry == max_retries or not is_transient_llm_error(e):
                 raise e
+            last_error = e
     raise last_error or Exception("Unexpected chat call error")
 
 
-def _safe_responses_call(client, timeout_seconds: int = 60, **kwargs):
-    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
-        fut = ex.submit(client.responses.create, **kwargs)
+def _safe_responses_call(client, timeout_seconds: int = 60, max_retries: int = 0, **kwargs):
+    # Same SDK-level bound as _safe_chat_call: an abandoned gpt-5 call otherwise keeps
+    # its LLM_EXECUTOR worker for the client-wide 180s (twice, with the SDK retry)
+    kwargs.setdefault("timeout", timeout_seconds)
+    last_error = None
+    for retry in range(max_retries + 1):
+        if retry > 0:
+            time.sleep(backoff_delay(retry, last_error, cap=8))
+        RATE_LIMITS.wait_if_throttled()
+        fut = LLM_EXECUTOR.submit(client.responses.create, **kwargs)
         try:
             return fut.result(timeout=timeout_seconds)
         except concurrent.futures.TimeoutError:
             fut.cancel()
             raise TimeoutError(f"Responses call timed out after {timeout_seconds}s")
+        except Exception as e:
+            if retry == max_retries or not is_transient_llm_error(e):
+                raise e
+            last_error = e
+    raise last_error or Exception("Unexpected responses call error")
+
+
+class ModelSpec(NamedTuple):
+    """One stage of the choose_and_call fallback chain."""
+    model: str
+    api: str      # "responses" | "chat_schema" | "chat_json"
+    cap: int      # adaptive timeout cap (seconds)
+    retries: int  # transient-error retries within this stage
+    label: str    # meta["api_used"]
+
+
+_FALLBACK_SPECS = (
+    ModelSpec("gpt-5", "responses", 75, 0, "responses_api"),
+    ModelSpec("gpt-4o", "chat_schema", 75, 1, "chat_completions"),
+    ModelSpec("gpt-4o-mini", "chat_json", 60, 0, "chat_completions_fallback"),
+)
+
+
+@functools.lru_cache(maxsize=8)
+def _encoding_for(model: str):
+    """tiktoken encoding for model (cl100k_base when the model is unknown)."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        return tiktoken.get_encoding("cl100k_base")
 
 
 def _extract_text_from_responses(response) -> Optional[str]:
-    # Try modern SDK shapes
-    if hasattr(response, 'output') and isinstance(response.output, list):
-        for item in response.output:
-            if hasattr(item, 'content') and item.content:
-                for c in item.content:
-                    if getattr(c, 'type', '') == 'output_text' and hasattr(c, 'text'):
-                        return c.text
-    if hasattr(response, 'text') and isinstance(response.text, str):
+    # Recent SDKs aggregate the text parts into output_text; no tree walk needed
+    text = getattr(response, 'output_text', None)
+    if isinstance(text, str) and text:
+        return text
+    # Otherwise take the first output_text part, short-circuiting on the hit
+    output = getattr(response, 'output', None)
+    if isinstance(output, list):
+        text = next((c.text for item in output for c in (getattr(item, 'content', None) or ())
+                     if getattr(c, 'type', '') == 'output_text' and hasattr(c, 'text')), None)
+        if text is not None:
+            return text
+    if isinstance(getattr(response, 'text', None), str):
         return response.text
     # Older shapes
     if hasattr(response, 'content') and isinstance(response.content, list):
@@ -114,18 +431,10 @@ def _extract_text_from_responses(response) -> Optional[str]:
 
 class LLMClient:
     def __init__(self, api_key: Optional[str] = None):
-        from openai import OpenAI  # Local import to avoid hard dep at import time
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            try:
-                from dotenv import load_dotenv
-                load_dotenv()
-                self.api_key = os.getenv("OPENAI_API_KEY")
-            except Exception:
-                pass
+        self.api_key = api_key or resolve_openai_api_key()
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY is required")
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = get_shared_openai_client(self.api_key)
         self._responses_capable = None  # Lazy probe
 
     def _probe_responses(self) -> bool:
@@ -134,28 +443,57 @@ class LLMClient:
         if os.getenv('DISCOVERY_FORCE_CHAT_COMPLETIONS', 'false').lower() == 'true':
             self._responses_capable = False
             return False
+        cached = load_persisted_capability(self.api_key)
+        if cached is not None:
+            self._responses_capable = cached
+            return cached
         try:
             _ = _safe_responses_call(self.client, timeout_seconds=6, model="gpt-5", input="ping", reasoning={"effort": "minimal"}, text={"verbosity": "low"})
             self._responses_capable = True
         except Exception:
             self._responses_capable = False
+        save_persisted_capability(self.api_key, self._responses_capable)
         return self._responses_capable
 
     @staticmethod
+    @functools.lru_cache(maxsize=512)
     def estimate_tokens(text: str, model: str = "gpt-4o") -> int:
+        # Memoized: chunk selection and the fallback stages re-estimate the same texts
         if not text:
             return 200
         if tiktoken is None:
             return max(200, int(len(text) / 4))
         try:
-            try:
-                enc = tiktoken.encoding_for_model(model)
-            except Exception:
-                enc = tiktoken.get_encoding("cl100k_base")
-            return max(200, len(enc.encode(text)))
+            return max(200, len(_encoding_for(model).encode(text)))
         except Exception:
             return max(200, int(len(text) / 4))
 
+    @staticmethod
+    def trim_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> Tuple[str, int, int]:
+        """
+        Bound text to max_tokens, keeping the head and the tail (sites put the brand
+        story up front and contact/about copy at the end).
+        Returns (text, original_tokens, trimmed_tokens).
+        """
+        if not text or max_tokens <= 0:
+            return text, 0, 0
+        if tiktoken is not None:
+            try:
+                enc = _encoding_for(model)
+                ids = enc.encode(text)
+                if len(ids) <= max_tokens:
+                    return text, len(ids), len(ids)
+                half = max_tokens // 2
+                return enc.decode(ids[:half]) + "\n...\n" + enc.decode(ids[-half:]), len(ids), max_tokens
+            except Exception:
+                pass
+        # Fallback heuristic: ~4 chars per token
+        original = int(len(text) / 4)
+        if original <= max_tokens:
+            return text, original, original
+        half_chars = (max_tokens // 2) * 4
+        return text[:half_chars] + "\n...\n" + text[-half_chars:], original, max_tokens
+
     @staticmethod
     def adaptive_timeout(tokens: int, cap: int = 90) -> int:
         return int(min(20 + 0.002 * tokens, cap))
@@ -166,94 +504,82 @@ class LLMClient:
         prompt: str,
         schema: Optional[dict] = None,
         enforce_schema: bool = False,
+        max_output_tokens: Optional[int] = None,
     ) -> Tuple[Optional[str], Dict[str, Any]]:
         meta: Dict[str, Any] = {"api_used": None, "model": None, "token_usage": 0, "token_estimate": 0}
 
         # Decide whether to try Responses first
-        breaker_open = CircuitBreaker.is_open(key_name)
+        breaker_open = CircuitBreaker.is_open(key_name) or CircuitBreaker.is_open(CircuitBreaker.GPT5)
         meta["breaker_open"] = breaker_open
-        use_responses = (not breaker_open) and self._probe_responses()
+        # Probe slots are claimed last, once the Responses stage is certain to be called
+        use_responses = (not breaker_open and self._probe_responses()
+                         and CircuitBreaker.allow_all(CircuitBreaker.GPT5, key_name))
 
-        # 1) Try GPT-5 Responses if allowed
-        if use_responses:
+        specs = [s for s in _FALLBACK_SPECS if use_responses or s.api != "responses"]
+        last_error: Optional[BaseException] = None
+        for spec in specs:
             try:
-                tokens = LLMClient.estimate_tokens(prompt, "gpt-5")
-                resp = _safe_responses_call(
-                    self.client,
-                    timeout_seconds=LLMClient.adaptive_timeout(tokens, cap=75),
-                    model="gpt-5",
-                    input=prompt,
-                    reasoning={"effort": "minimal"},
-                    text={"verbosity": "low"}
-                )
-                raw = _extract_text_from_responses(resp)
-                if not raw:
-                    raise Exception("Failed to extract JSON from GPT-5 response")
-                meta.update({"api_used": "responses_api", "model": "gpt-5", "token_estimate": tokens})
-                CircuitBreaker.record_result(key_name, success=True)
-                # usage is not standardized; leave token_usage as 0 if missing
-                try:
-                    meta["token_usage"] = resp.usage.total_tokens  # type: ignore
-                except Exception:
-                    pass
-                return raw, meta
-            except Exception:
+                raw, call_meta = self._call_spec(spec, prompt, schema, enforce_schema, max_output_tokens)
+            except Exception as e:
                 CircuitBreaker.record_result(key_name, success=False)
+                if spec.model == CircuitBreaker.GPT5:
+                    CircuitBreaker.record_result(CircuitBreaker.GPT5, success=False)
+                last_error = e
+                continue
+            CircuitBreaker.record_result(key_name, success=True)
+            if spec.model == CircuitBreaker.GPT5:
+                CircuitBreaker.record_result(CircuitBreaker.GPT5, success=True)
+            meta.update(call_meta)
+            return raw, meta
+        raise last_error or Exception("All LLM fallbacks failed")
 
-        # 2) Fallback to GPT-4o Chat with optional schema enforcement
-        try:
+    def _call_spec(
+        self,
+        spec: ModelSpec,
+        prompt: str,
+        schema: Optional[dict],
+        enforce_schema: bool,
+        max_output_tokens: Optional[int],
+    ) -> Tuple[Optional[str], Dict[str, Any]]:
+        """One fallback stage: build the request for spec.api, call it with transient retry."""
+        tokens = LLMClient.estimate_tokens(prompt, spec.model)
+        timeout = LLMClient.adaptive_timeout(tokens, cap=spec.cap)
+        if spec.api == "responses":
+            resp = _safe_responses_call(
+                self.client,
+                timeout_seconds=timeout,
+                max_retries=spec.retries,
+                model=spec.model,
+                input=prompt,
+                reasoning={"effort": "minimal"},
+                text={"verbosity": "low"},
+                **({"max_output_tokens": max_output_tokens} if max_output_tokens else {})
+            )
+            raw = _extract_text_from_responses(resp)
+            if not raw:
+                raise Exception("Failed to extract JSON from GPT-5 response")
+            model = spec.model
+        else:
             kwargs = {
-                "model": "gpt-4o",
+                "model": spec.model,
                 "messages": [
                     {"role": "system", "content": "You are a senior brand strategist. Output only valid JSON."},
                     {"role": "user", "content": prompt},
                 ],
+                "response_format": {"type": "json_object"},
             }
-            if enforce_schema and schema:
+            if spec.api == "chat_schema" and enforce_schema and schema:
                 kwargs["response_format"] = {
                     "type": "json_schema",
                     "json_schema": {"name": "Schema", "schema": schema, "strict": True},
                 }
-            else:
-                kwargs["response_format"] = {"type": "json_object"}
-
-            tokens = LLMClient.estimate_tokens(prompt, "gpt-4o")
-            chat_resp = _safe_chat_call(self.client, timeout_seconds=LLMClient.adaptive_timeout(tokens, cap=75), max_retries=1, **kwargs)
-            raw = getattr(chat_resp.choices[0].message, "content", None)
-            meta.update({
-                "api_used": "chat_completions",
-                "model": getattr(chat_resp, 'model', 'gpt-4o'),
-                "token_usage": getattr(getattr(chat_resp, 'usage', None), 'total_tokens', 0),
-                "token_estimate": tokens
-            })
-            CircuitBreaker.record_result(key_name, success=True)
-            return raw, meta
-        except Exception:
-            CircuitBreaker.record_result(key_name, success=False)
-
-        # 3) Final fallback to GPT-4o-mini (fast)
-        try:
-            kwargs = {
-                "model": "gpt-4o-mini",
-                "messages": [
-                    {"role": "system", "content": "You are a senior brand strategist. Output only valid JSON."},
-                    {"role": "user", "content": prompt},
-                ],
-                "response_format": {"type": "json_object"}
-            }
-            tokens = LLMClient.estimate_tokens(prompt, "gpt-4o-mini")
-            mini_resp = _safe_chat_call(self.client, timeout_seconds=LLMClient.adaptive_timeout(tokens, cap=60), max_retries=0, **kwargs)
-            raw = getattr(mini_resp.choices[0].message, "content", None)
-            meta.update({
-                "api_used": "chat_completions_fallback",
-                "model": getattr(mini_resp, 'model', 'gpt-4o-mini'),
-                "token_usage": getattr(getattr(mini_resp, 'usage', None), 'total_tokens', 0),
-                "token_estimate": tokens
-            })
-            CircuitBreaker.record_result(key_name, success=True)
-            return raw, meta
-        except Exception:
-            CircuitBreaker.record_result(key_name, success=False)
-            raise
+            if max_output_tokens:
+                kwargs["max_tokens"] = max_output_tokens
+            resp = _safe_chat_call(self.client, timeout_seconds=timeout, max_retries=spec.retries, **kwargs)
+            raw = getattr(resp.choices[0].message, "content", None)
+            model = getattr(resp, 'model', spec.model)
+        # usage is not standardized on Responses; leave token_usage as 0 if missing
+        usage = getattr(getattr(resp, 'usage', None), 'total_tokens', 0) or 0
+        return raw, {"api_used": spec.label, "model": model, "token_usage": usage, "token_estimate": tokens}
 
 
@@ -13,6 +13,7 @@ import traceback
 import random
 import warnings
 from collections import defaultdict
+from types import MappingProxyType
 try:
     from defusedxml import ElementTree as ET
 except ImportError:
@@ -51,7 +52,7 @@ from urllib.parse import urljoin, urlparse, urlsplit
 import itertools
 from urllib.robotparser import RobotFileParser
 from bs4 import BeautifulSoup, Tag
-from openai import OpenAI
+from llm_client import get_shared_openai_client
 from dotenv import load_dotenv
 import httpx
 
@@ -864,9 +865,22 @@ def _fetch_page_data_scrapfly(url: str, take_screenshot: bool = True):
         # Other non-transient issues
         return _handle_scrapfly_error(url, e)
 
+# Static Scrapfly options shared by every request; per-call key/url are layered on top.
+# Note: Not specifying "format" parameter means Scrapfly returns raw HTML in result.content
+_SCRAPFLY_PARAMS_BASE = MappingProxyType({
+    "render_js": True,
+    "asp": True,
+    "auto_scroll": True,
+    "wait_for_selector": "footer a, nav a, main a, [role='main'] a, [class*='footer'] a",
+    "rendering_stage": "domcontentloaded",
+    "rendering_wait": 3000,
+    "retry": True,
+    "country": "us",
+    "proxy_pool": "public_residential_pool",
+})
+
 def _scrapfly_request_inner(url: str, api_key: str, take_screenshot: bool):
-    # Note: Not specifying "format" parameter means Scrapfly returns raw HTML in result.content
-    params = {"key": api_key, "url": url, "render_js": True, "asp": True, "auto_scroll": True, "wait_for_selector": "footer a, nav a, main a, [role='main'] a, [class*='footer'] a", "rendering_stage": "domcontentloaded", "rendering_wait": 3000, "retry": True, "country": "us", "proxy_pool": "public_residential_pool"}
+    params = {"key": api_key, "url": url, **_SCRAPFLY_PARAMS_BASE}
     if take_screenshot:
         params["screenshots[main]"] = "fullpage"
         params["screenshot_flags"] = "load_images,block_banners"
@@ -1283,9 +1297,14 @@ def validate_configuration(runtime_check=False):
 # Validate configuration on import (non-fatal)
 validate_configuration(runtime_check=False)
 
+def _diagnosis_client(api_key):
+    """Diagnosis-mode view of the process-wide OpenAI client: same connection pool as
+    Discovery, with the SDK's default retries/timeout (these calls have no wrapper retries)."""
+    return get_shared_openai_client(api_key).with_options(max_retries=2, timeout=600.0)
+
 # Initialize OpenAI client (will be checked at runtime)
 try:
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    client = _diagnosis_client(os.getenv("OPENAI_API_KEY"))
 except Exception as e:
     log("warn", f"OpenAI client initialization deferred: {e}")
     client = None
@@ -2477,7 +2496,7 @@ def analyze_memorability_key(key_name, prompt_template, text_corpus, homepage_sc
         openai_key = os.getenv("OPENAI_API_KEY")
         if not openai_key:
             raise ValueError("OPENAI_API_KEY environment variable is required for AI analysis")
-        client = OpenAI(api_key=openai_key)
+        client = _diagnosis_client(openai_key)
     
     # DIAGNOSTIC: Check screenshot parameter
     has_screenshot = homepage_screenshot_b64 is not None
@@ -2,14 +2,21 @@
 # Clean implementation with proper function decomposition
 
 import os
+import re
 import json
 import time
 import uuid
+import base64
+import socket
 import asyncio
+import ipaddress
 import concurrent.futures
 from typing import Optional, Tuple, Generator, List, Dict, Any, Set
 from threading import Lock
 from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
 
 # === Core Scanner Functionality ===
 
@@ -32,9 +39,6 @@ def validate_url(url: str) -> Tuple[bool, str, str]:
         if not url or len(url) > 2048:
             return False, "Invalid URL format", ""
         # SSRF hardening: block localhost and private IP ranges (by hostname and resolved IP)
-        from urllib.parse import urlparse
-        import socket
-        import ipaddress
         hostname = urlparse(url).hostname or ""
         host_lower = hostname.lower()
         blocked_prefixes = ('localhost', '127.', '0.0.0.0', '::1')
@@ -207,11 +211,8 @@ def run_content_extraction_phase(initial_url: str, homepage_html: str, all_disco
             score_link_pool, fetch_page_content_robustly, 
             get_social_media_text, cleanup_cache, detect_image_format, is_vetoed_url
         )
-        from bs4 import BeautifulSoup
-        import uuid
         
         # Utilities for high-signal filtering and novelty checks
-        import re
         def is_high_signal_url(url: str) -> bool:
             u = url.lower()
             keywords = [
@@ -299,21 +300,16 @@ def run_content_extraction_phase(initial_url: str, homepage_html: str, all_disco
                 yield {'type': 'activity', 'message': f'✅ Homepage screenshot captured', 'timestamp': time.time()}
                 # Cache screenshot on disk (failsafe) and in memory, then emit screenshot_ready
                 try:
-                    from scanner import detect_image_format
-                    import uuid as _uuid
-                    import os as _os
-                    from io import BytesIO as _BytesIO
-                    import base64 as _b64
-                    screenshot_id = f"home-{_uuid.uuid4().hex}"
+                    screenshot_id = f"home-{uuid.uuid4().hex}"
                     mime = detect_image_format(homepage_screenshot_b64)
                     # Persist to disk
-                    base_dir = _os.getenv("PERSISTENT_DATA_DIR", _os.path.join(_os.getcwd(), "data"))
-                    ss_dir = _os.path.join(base_dir, "screenshots")
-                    _os.makedirs(ss_dir, exist_ok=True)
+                    base_dir = os.getenv("PERSISTENT_DATA_DIR", os.path.join(os.getcwd(), "data"))
+                    ss_dir = os.path.join(base_dir, "screenshots")
+                    os.makedirs(ss_dir, exist_ok=True)
                     ext = 'png' if mime.endswith('png') else 'jpg'
-                    file_path = _os.path.join(ss_dir, f"{screenshot_id}.{ext}")
+                    file_path = os.path.join(ss_dir, f"{screenshot_id}.{ext}")
                     with open(file_path, 'wb') as f:
-                        f.write(_b64.b64decode(homepage_screenshot_b64))
+                        f.write(base64.b64decode(homepage_screenshot_b64))
                     # Cache reference
                     if shared_cache is not None:
                         shared_cache[screenshot_id] = { 'path': file_path, 'format': mime }
@@ -354,7 +350,6 @@ def run_content_extraction_phase(initial_url: str, homepage_html: str, all_disco
                     log("info", f"✅ Content extracted from {u}")
         
         # Distillation helpers
-        from bs4 import BeautifulSoup
         def distill_page(url: str, html: str) -> Optional[str]:
             try:
                 soup = BeautifulSoup(html, "html.parser")
@@ -501,6 +496,11 @@ def build_tone_candidates(full_corpus: str, max_chars: int = 4000) -> str:
         return text[:max_chars]
     except Exception:
         return full_corpus[:max_chars]
+def _start_brand_elements(analyzer, screenshots: List[str], full_corpus: str) -> concurrent.futures.Future:
+    """Start the vision analysis in the background; it does not depend on the text keys."""
+    from discovery_integration import _VISION_EXECUTOR
+    return _VISION_EXECUTOR.submit(analyzer.analyze_brand_elements, screenshots, full_corpus)
+
 def run_analysis_phase(mode: str, scan_id: str, full_corpus: str, homepage_screenshot_b64: str, brand_summary: str, circuit_breaker):
     """Phase 3: Perform Discovery or Diagnosis analysis based on mode."""
     
@@ -511,17 +511,27 @@ def run_analysis_phase(mode: str, scan_id: str, full_corpus: str, homepage_scree
         try:
             # Check content size and choose appropriate analyzer
             content_size = len(full_corpus) if full_corpus else 0
+            brand_elements_future = None
+            concurrent_result = None
             
             if content_size > 40000:
-                # Use optimized analyzer for very large content
-                print(f"[INFO] Using optimized Discovery analyzer for large content ({content_size} chars)")
-                from discovery_integration_optimized import OptimizedDiscoveryAnalyzer
-                discovery_analyzer = OptimizedDiscoveryAnalyzer(scan_id, {})
-                concurrent_result = discovery_analyzer.analyze_all_optimized(full_corpus)
-            else:
+                # Use optimized analyzer for very large content (when that module is deployed)
+                try:
+                    from discovery_integration_optimized import OptimizedDiscoveryAnalyzer
+                except ImportError:
+                    OptimizedDiscoveryAnalyzer = None
+                if OptimizedDiscoveryAnalyzer is not None:
+                    print(f"[INFO] Using optimized Discovery analyzer for large content ({content_size} chars)")
+                    discovery_analyzer = OptimizedDiscoveryAnalyzer(scan_id, {})
+                    concurrent_result = discovery_analyzer.analyze_all_optimized(full_corpus)
+            if concurrent_result is None:
                 # Use standard analyzer for normal content
                 from discovery_integration import DiscoveryAnalyzer
                 discovery_analyzer = DiscoveryAnalyzer(scan_id, {})
+                # Vision runs alongside the text analyses instead of after them
+                brand_elements_future = _start_brand_elements(
+                    discovery_analyzer, [homepage_screenshot_b64] if homepage_screenshot_b64 else [], full_corpus
+                )
                 concurrent_result = discovery_analyzer.analyze_all_concurrent(full_corpus)
             
             if not concurrent_result.get('success'):
@@ -566,24 +576,19 @@ def run_analysis_phase(mode: str, scan_id: str, full_corpus: str, homepage_scree
                     }
                     yield {'type': 'activity', 'message': f'✅ {key_name.replace("_", " ").title()} analysis complete', 'timestamp': time.time()}
 
-            # Optionally run visual analysis (brand elements) and alignment based on env + screenshot size
+            # Visual analysis (brand elements) and alignment
             visual_enabled = True  # Always on as requested
-            homepage_ok = False
-            if visual_enabled and homepage_screenshot_b64:
-                try:
-                    import base64
-                    bytes_len = len(base64.b64decode(homepage_screenshot_b64))
-                    homepage_ok = bytes_len > 10 * 1024  # Lower threshold to ensure analysis runs
-                except Exception:
-                    homepage_ok = False
 
             brand_elements_result = None
             if visual_enabled:
                 yield {'type': 'status', 'message': 'Running visual brand analysis…', 'phase': 'ai_analysis', 'progress': 80}
                 try:
-                    # Use same analyzer instance to run vision
-                    screenshots = [homepage_screenshot_b64] if homepage_screenshot_b64 else []
-                    brand_elements, be_metrics = discovery_analyzer.analyze_brand_elements(screenshots, full_corpus)
+                    # Use same analyzer instance to run vision (already started for the standard analyzer)
+                    if brand_elements_future is not None:
+                        brand_elements, be_metrics = brand_elements_future.result()
+                    else:
+                        screenshots = [homepage_screenshot_b64] if homepage_screenshot_b64 else []
+                        brand_elements, be_metrics = discovery_analyzer.analyze_brand_elements(screenshots, full_corpus)
                     if brand_elements and isinstance(brand_elements, dict):
                         brand_elements_result = brand_elements
                         all_results.append({'type': 'discovery_result', 'key': 'brand_elements', 'analysis': brand_elements})
@@ -883,9 +888,8 @@ def run_full_scan_stream(url: str, cache: dict, preferred_lang: str = 'en', scan
 
         if mode == 'discovery' and DISCOVERY_AVAILABLE:
             try:
-                from discovery_integration import DiscoveryAnalyzer
+                from discovery_integration import DiscoveryAnalyzer, _as_completed_gated
                 analyzer = DiscoveryAnalyzer(scan_id, {})
-                from concurrent.futures import ThreadPoolExecutor, as_completed
                 # Build candidate lines for key_messages from distilled pages to reduce tokens
                 try:
                     message_candidates_lines: List[str] = []
@@ -911,41 +915,44 @@ def run_full_scan_stream(url: str, cache: dict, preferred_lang: str = 'en', scan
                         message_candidates = full_corpus[:6000]
                 except Exception:
                     message_candidates = full_corpus[:6000]
-                with ThreadPoolExecutor(max_workers=2) as pool:
-                    future_map = {
-                        pool.submit(analyzer.analyze_positioning_themes, full_corpus): 'positioning_themes',
-                        pool.submit(analyzer.analyze_key_messages, message_candidates): 'key_messages',
-                        pool.submit(analyzer.analyze_tone_of_voice, build_tone_candidates(full_corpus)): 'tone_of_voice'
-                    }
-                    for fut in as_completed(list(future_map.keys())):
-                        key_name = future_map[fut]
-                        try:
-                            result, metrics = fut.result()
-                            if result:
-                                payload = {
-                                    'type': 'discovery_result',
-                                    'key': key_name,
-                                    'analysis': result,
-                                    'metrics': {
-                                        'latency_ms': metrics.get('latency_ms', 0),
-                                        'token_usage': metrics.get('token_usage', 0),
-                                        'model': metrics.get('model', 'gpt-5')
-                                    }
+                # Vision only needs the screenshot + corpus: start it before the text keys
+                brand_elements_future = _start_brand_elements(
+                    analyzer, [homepage_screenshot_b64] if homepage_screenshot_b64 else [], full_corpus
+                )
+                # Shared analysis pool; this scan's text keys go in at most 2 at a time
+                tone_candidates = build_tone_candidates(full_corpus)
+                text_tasks = [
+                    ('positioning_themes', lambda: analyzer.analyze_positioning_themes(full_corpus)),
+                    ('key_messages', lambda: analyzer.analyze_key_messages(message_candidates)),
+                    ('tone_of_voice', lambda: analyzer.analyze_tone_of_voice(tone_candidates)),
+                ]
+                for key_name, fut in _as_completed_gated(text_tasks, limit=2):
+                    try:
+                        result, metrics = fut.result()
+                        if result:
+                            payload = {
+                                'type': 'discovery_result',
+                                'key': key_name,
+                                'analysis': result,
+                                'metrics': {
+                                    'latency_ms': metrics.get('latency_ms', 0),
+                                    'token_usage': metrics.get('token_usage', 0),
+                                    'model': metrics.get('model', 'gpt-5')
                                 }
-                                yield payload
-                                all_results.append(payload)
-                                yield {'type': 'activity', 'message': f'✅ {key_name.replace("_"," ").title()} analysis complete', 'timestamp': time.time()}
-                            else:
-                                yield {'type': 'error', 'message': _get_discovery_error_explanation(metrics.get('error_details','analysis failed'))}
-                        except Exception as e:
-                            yield {'type': 'error', 'message': _get_discovery_error_explanation(str(e))}
-                            continue
+                            }
+                            yield payload
+                            all_results.append(payload)
+                            yield {'type': 'activity', 'message': f'✅ {key_name.replace("_"," ").title()} analysis complete', 'timestamp': time.time()}
+                        else:
+                            yield {'type': 'error', 'message': _get_discovery_error_explanation(metrics.get('error_details','analysis failed'))}
+                    except Exception as e:
+                        yield {'type': 'error', 'message': _get_discovery_error_explanation(str(e))}
+                        continue
 
                 # After text keys, run visual brand analysis and alignment (always on)
                 try:
                     yield {'type': 'status', 'message': 'Running visual brand analysis…', 'phase': 'ai_analysis', 'progress': 80}
-                    screenshots = [homepage_screenshot_b64] if homepage_screenshot_b64 else []
-                    brand_elements, be_metrics = analyzer.analyze_brand_elements(screenshots, full_corpus)
+                    brand_elements, be_metrics = brand_elements_future.result()
                     if brand_elements:
                         be_payload = {
                             'type': 'discovery_result',
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Unit tests for discovery_integration internals: buffered JSONL log writers,
+streaming drains, in-flight coalescing, gated submission and the per-key disk
+cache.
+Run with: python -m pytest -q test_discovery_integration.py
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import types
+
+os.environ.setdefault("PERSISTENT_DATA_DIR", tempfile.mkdtemp(prefix="discovery_test_"))
+
+import pytest
+
+import discovery_integration as di
+from discovery_integration import DiscoveryAnalyzer
+from discovery_schemas import ToneOfVoiceResult
+
+
+# === Buffered JSONL log writers ===
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    yield path
+    with di._LOG_WRITERS_LOCK:
+        w = di._LOG_WRITERS.pop(path, None)
+    if w is not None:
+        w.close()
+
+
+@pytest.fixture
+def fresh_timer(monkeypatch):
+    """No flush timer running, so the test controls when (and how often) one starts."""
+    def _stop():
+        if di._log_flush_timer is not None:
+            di._log_flush_timer.cancel()
+            di._log_flush_timer = None
+    _stop()
+    yield monkeypatch
+    _stop()
+
+
+def _read_lines(path):
+    with open(path, "rb") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_appends_are_buffered_until_flush_and_keep_order(log_path):
+    for i in range(50):
+        di._append_jsonl(log_path, {"seq": i})
+    assert os.path.getsize(log_path) == 0  # Still in the writer's buffer
+    di._flush_log_writers(fsync=True)
+    assert [e["seq"] for e in _read_lines(log_path)] == list(range(50))
+
+
+def test_one_shared_handle_per_path(log_path):
+    di._append_jsonl(log_path, {"seq": 0})
+    w = di._LOG_WRITERS[log_path]
+    di._append_jsonl(log_path, {"seq": 1})
+    assert di._LOG_WRITERS[log_path] is w
+
+
+def test_timer_flushes_and_fsyncs_in_background(log_path, fresh_timer):
+    synced = []
+    real_fsync = os.fsync
+    fresh_timer.setattr(di, "_LOG_FLUSH_INTERVAL", 0.01)
+    fresh_timer.setattr(di.os, "fsync", lambda fd: (synced.append(fd), real_fsync(fd)))
+    di._append_jsonl(log_path, {"seq": 0})
+    assert di._log_flush_timer is not None
+    deadline = time.monotonic() + 2
+    while os.path.getsize(log_path) == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _read_lines(log_path) == [{"seq": 0}]
+    assert di._LOG_WRITERS[log_path].fileno() in synced
+
+
+def test_rewrite_then_append_keeps_order(log_path):
+    for i in range(3):
+        di._append_jsonl(log_path, {"seq": i})
+    di._rewrite_jsonl(log_path, [{"seq": 1}, {"seq": 2}])
+    assert log_path not in di._LOG_WRITERS  # Old handle closed; reopened on next append
+    di._append_jsonl(log_path, {"seq": 3})
+    di._flush_log_writers(fsync=False)
+    assert [e["seq"] for e in _read_lines(log_path)] == [1, 2, 3]
+
+
+# === Streaming drains ===
+
+def _ns(**kw):
+    return types.SimpleNamespace(**kw)
+
+
+class _FakeClient:
+    def __init__(self, events):
+        self.calls = []
+        create = self._create
+        self.chat = _ns(completions=_ns(create=create))
+        self.responses = _ns(create=create)
+        self._events = events
+
+    def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        return iter(self._events)
+
+
+def test_drain_chat_stream_joins_deltas_and_takes_final_usage():
+    usage = _ns(total_tokens=42)
+    client = _FakeClient([
+        _ns(model="gpt-4o-2024", usage=None, choices=[_ns(delta=_ns(content='{"a": '))]),
+        _ns(model=None, usage=None, choices=[_ns(delta=_ns(content=None))]),
+        _ns(model=None, usage=None, choices=[_ns(delta=_ns(content="1}"))]),
+        _ns(model=None, usage=usage, choices=[]),
+    ])
+    response = di._drain_chat_stream(client, model="gpt-4o", messages=[], stream=True)
+    assert response.choices[0].message.content == '{"a": 1}'
+    assert response.choices[0].message.parsed is None
+    assert response.usage is usage
+    assert response.model == "gpt-4o-2024"
+    assert client.calls[0]["stream_options"] == {"include_usage": True}
+
+
+def test_drain_responses_stream_assembles_output_text():
+    final = _ns(usage=_ns(total_tokens=7), model="gpt-5-2025")
+    client = _FakeClient([
+        _ns(type="response.created"),
+        _ns(type="response.output_text.delta", delta="hel"),
+        _ns(type="response.reasoning_summary_text.delta", delta="ignored"),
+        _ns(type="response.output_text.delta", delta="lo"),
+        _ns(type="response.completed", response=final),
+    ])
+    response = di._drain_responses_stream(client, model="gpt-5", input="x")
+    assert response.output_text == "hello"
+    assert response.usage.total_tokens == 7
+    assert response.model == "gpt-5-2025"
+    assert client.calls[0]["stream"] is True
+
+
+def test_drain_responses_stream_raises_on_failure_event():
+    client = _FakeClient([
+        _ns(type="response.output_text.delta", delta="partial"),
+        _ns(type="response.failed", response=_ns(error="server_error")),
+    ])
+    with pytest.raises(Exception, match="server_error"):
+        di._drain_responses_stream(client, model="gpt-5", input="x")
+
+
+class _EndlessStream:
+    def __init__(self):
+        self.closed = False
+
+    def __iter__(self):
+        while True:
+            yield _ns(type="response.output_text.delta", delta="x")
+
+    def close(self):
+        self.closed = True
+
+
+def test_drain_closes_stream_at_deadline():
+    stream = _EndlessStream()
+    client = _ns(responses=_ns(create=lambda **kwargs: stream))
+    with pytest.raises(TimeoutError):
+        di._drain_responses_stream(client, deadline=time.monotonic() + 0.05, model="gpt-5", input="x")
+    assert stream.closed
+
+
+# === In-flight coalescing ===
+
+def test_singleflight_coalesces_concurrent_callers():
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"themes": ["a"]}, {"latency_ms": 1}
+
+    key = ("positioning_themes", "digest-coalesce", True)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(di._singleflight(key, compute)))
+               for _ in range(4)]
+    threads[0].start()
+    while key not in di._INFLIGHT:
+        time.sleep(0.001)
+    for t in threads[1:]:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 4
+    assert sum(1 for _, m in results if m.get("coalesced")) == 3
+    # Followers get their own copy, not the leader's object
+    payloads = [r for r, _ in results]
+    assert all(p == {"themes": ["a"]} for p in payloads)
+    assert len({id(p) for p in payloads}) == 4
+    assert key not in di._INFLIGHT
+
+
+def test_singleflight_propagates_errors_and_clears_key():
+    key = ("key_messages", "digest-error", False)
+
+    def compute():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        di._singleflight(key, compute)
+    assert key not in di._INFLIGHT
+    # A later call computes afresh
+    assert di._singleflight(key, lambda: ("ok", {})) == ("ok", {})
+
+
+def test_fingerprint_from_digest_skips_the_text():
+    analyzer = object.__new__(DiscoveryAnalyzer)
+
+    def fp(text, digest, presanitized=True):
+        return analyzer._compute_fingerprint("tone_of_voice", text, ToneOfVoiceResult, digest, presanitized)
+
+    assert fp("corpus a", "d1") == fp("corpus b", "d1")
+    assert fp("corpus a", "d1") != fp("corpus a", "d2")
+    assert fp("corpus a", "d1") != fp("corpus a", "d1", presanitized=False)
+
+
+# === Gated submission ===
+
+def _sleeper(seconds, live, peak, lock):
+    def run():
+        with lock:
+            live[0] += 1
+            peak[0] = max(peak[0], live[0])
+        time.sleep(seconds)
+        with lock:
+            live[0] -= 1
+        return seconds
+    return run
+
+
+def test_gated_submission_caps_in_flight_and_yields_in_completion_order():
+    live, peak, lock = [0], [0], threading.Lock()
+    tasks = [(k, _sleeper(s, live, peak, lock)) for k, s in (("a", 0.2), ("b", 0.02), ("c", 0.02))]
+    done = [(key, future.result()) for key, future in di._as_completed_gated(tasks, limit=2)]
+    assert [key for key, _ in done] == ["b", "c", "a"]
+    assert peak[0] == 2
+
+
+def test_gated_submission_times_out_without_starting_queued_tasks():
+    started = []
+    release = threading.Event()
+
+    def task(key):
+        def run():
+            started.append(key)
+            release.wait(5)
+        return run
+
+    tasks = [(k, task(k)) for k in ("a", "b", "c")]
+    try:
+        with pytest.raises(di.concurrent.futures.TimeoutError):
+            list(di._as_completed_gated(tasks, limit=2, timeout=0.05))
+    finally:
+        release.set()
+    assert "c" not in started
+
+
+# === Per-key disk cache ===
+
+@pytest.fixture
+def analyzer(tmp_path, monkeypatch):
+    a = object.__new__(DiscoveryAnalyzer)
+    a.cache_root = str(tmp_path)
+    a.redis = None
+    monkeypatch.setattr(DiscoveryAnalyzer, "_memory_cache", di.OrderedDict())
+    return a
+
+
+def test_disk_cache_round_trip_leaves_no_temp_files(analyzer, tmp_path):
+    analyzer._persist_cached_result("tone_of_voice", "fp1", di._json_dumps_bytes({"confidence": 80}))
+    assert os.listdir(tmp_path / "tone_of_voice") == ["fp1.json"]
+    assert analyzer._load_cached_result("tone_of_voice", "fp1") == {"confidence": 80}
+
+
+def test_disk_cache_ignores_stale_entries(analyzer, tmp_path, monkeypatch):
+    analyzer._persist_cached_result("tone_of_voice", "fp2", di._json_dumps_bytes({"confidence": 80}))
+    monkeypatch.setattr(DiscoveryAnalyzer, "_memory_cache_ttl", 60)
+    path = tmp_path / "tone_of_voice" / "fp2.json"
+    old = time.time() - 61
+    os.utime(path, (old, old))
+    assert analyzer._load_cached_result("tone_of_voice", "fp2") is None
+
+
+def test_disk_cache_replace_is_atomic(analyzer, tmp_path):
+    analyzer._persist_cached_result("key_messages", "fp3", di._json_dumps_bytes({"v": 1}))
+    analyzer._persist_cached_result("key_messages", "fp3", di._json_dumps_bytes({"v": 2}))
+    assert os.listdir(tmp_path / "key_messages") == ["fp3.json"]
+    assert analyzer._load_cached_result("key_messages", "fp3") == {"v": 2}
+
+
+def test_disk_cache_miss_and_memory_promotion(analyzer):
+    assert analyzer._load_cached_result("key_messages", "missing") is None
+    analyzer._persist_cached_result("key_messages", "fp4", di._json_dumps_bytes({"v": 1}))
+    first = analyzer._load_cached_result("key_messages", "fp4")
+    first["v"] = 99  # Callers mutate results; the cached copy must not change
+    assert analyzer._load_cached_result("key_messages", "fp4") == {"v": 1}
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Unit tests for SchemaValidator.validate_with_repair: the model_validate_json fast
+path must agree with the dict/repair path.
+Run with: python -m pytest -q test_discovery_schemas.py
+"""
+
+import json
+
+import pytest
+
+from discovery_schemas import (
+    SchemaValidator,
+    PositioningThemesResult,
+    ToneOfVoiceResult,
+    VisualTextAlignmentResult,
+)
+
+POSITIONING = {
+    "themes": [
+        {
+            "theme": "Reliability",
+            "description": "Positions the brand as dependable.",
+            "evidence_quotes": ["Built to last."],
+            "confidence": 80,
+        }
+    ]
+}
+
+ALIGNMENT = {"alignment": "Yes", "justification": "Imagery matches the themes."}
+
+TONE = {
+    "primary_tone": {"tone": "Warm", "justification": "Friendly copy.", "evidence_quote": "We're here for you."},
+    "secondary_tone": {"tone": "Bold", "justification": "Confident claims.", "evidence_quote": "The best, period."},
+    "contradictions": [],
+    "confidence": 70,
+}
+
+
+@pytest.fixture
+def validator():
+    return SchemaValidator()
+
+
+@pytest.mark.parametrize("schema_class,payload", [
+    (PositioningThemesResult, POSITIONING),
+    (VisualTextAlignmentResult, ALIGNMENT),
+    (ToneOfVoiceResult, TONE),
+])
+def test_fast_path_matches_dict_path(validator, schema_class, payload):
+    from_str, str_repairs = validator.validate_with_repair(json.dumps(payload), schema_class, "k")
+    from_dict, dict_repairs = validator.validate_with_repair(dict(payload), schema_class, "k")
+    assert from_str is not None
+    assert from_str == from_dict == schema_class.model_validate(payload)
+    assert str_repairs == dict_repairs == []
+
+
+def test_fenced_output_falls_back_to_repair(validator):
+    raw = "```json\n" + json.dumps(ALIGNMENT) + "\n```"
+    result, repairs = validator.validate_with_repair(raw, VisualTextAlignmentResult, "visual_text_alignment")
+    assert result == VisualTextAlignmentResult.model_validate(ALIGNMENT)
+    assert repairs == ["stripped_code_fence"]
+
+
+def test_embedded_json_is_extracted(validator):
+    raw = "Here is the analysis: " + json.dumps(ALIGNMENT) + " Hope this helps."
+    result, repairs = validator.validate_with_repair(raw, VisualTextAlignmentResult, "visual_text_alignment")
+    assert result == VisualTextAlignmentResult.model_validate(ALIGNMENT)
+    assert repairs == ["extracted_subjson"]
+
+
+def test_invalid_output_returns_none(validator):
+    result, repairs = validator.validate_with_repair("not json", VisualTextAlignmentResult, "visual_text_alignment")
+    assert result is None
+    assert "json_parse_failed" in repairs
+
+
+def test_normalized_schema_skips_fast_path(validator, monkeypatch):
+    seen = []
+
+    def normalize(data):
+        seen.append(data)
+        return data
+
+    monkeypatch.setitem(SchemaValidator._PAYLOAD_NORMALIZERS, ToneOfVoiceResult, normalize)
+    result, _ = validator.validate_with_repair(json.dumps(TONE), ToneOfVoiceResult, "tone_of_voice")
+    assert result is not None
+    assert seen == [TONE]
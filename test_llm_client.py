@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Unit tests for llm_client: circuit breaker half-open behaviour, rate-limit header
+parsing/tracking and the persisted Responses-capability cache.
+Run with: python -m pytest -q test_llm_client.py
+"""
+
+import os
+import time
+
+import pytest
+
+import llm_client
+from llm_client import (
+    CircuitBreaker,
+    RateLimitTracker,
+    _parse_reset,
+    _retry_after_from_headers,
+    load_persisted_capability,
+    save_persisted_capability,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fresh breaker state with a controllable clock."""
+    now = [1000.0]
+    monkeypatch.setattr(CircuitBreaker, "_state", {})
+    monkeypatch.setattr(CircuitBreaker, "_now", classmethod(lambda cls: now[0]))
+    monkeypatch.setenv("DISCOVERY_CB_THRESHOLD", "3")
+    monkeypatch.setenv("DISCOVERY_CB_COOLDOWN_SECONDS", "600")
+    monkeypatch.setenv("DISCOVERY_CB_PROBE_SECONDS", "120")
+    return now
+
+
+def _trip(key):
+    for _ in range(3):
+        CircuitBreaker.record_result(key, success=False)
+
+
+# === CircuitBreaker ===
+
+def test_breaker_opens_after_threshold(clock):
+    CircuitBreaker.record_result("k", success=False)
+    CircuitBreaker.record_result("k", success=False)
+    assert CircuitBreaker.allow("k")
+    CircuitBreaker.record_result("k", success=False)
+    assert CircuitBreaker.is_open("k")
+    assert not CircuitBreaker.allow("k")
+
+
+def test_half_open_admits_a_single_probe(clock):
+    _trip("k")
+    clock[0] += 601
+    assert not CircuitBreaker.is_open("k")
+    assert CircuitBreaker.allow("k")
+    # Other callers are blocked while the probe is in flight
+    assert not CircuitBreaker.allow("k")
+    # ...until the probe window lapses without a report
+    clock[0] += 121
+    assert CircuitBreaker.allow("k")
+
+
+def test_probe_success_closes_and_failure_reopens(clock):
+    _trip("k")
+    clock[0] += 601
+    assert CircuitBreaker.allow("k")
+    CircuitBreaker.record_result("k", success=True)
+    assert CircuitBreaker.allow("k") and CircuitBreaker.allow("k")
+
+    _trip("k")
+    clock[0] += 601
+    assert CircuitBreaker.allow("k")
+    CircuitBreaker.record_result("k", success=False)
+    assert CircuitBreaker.is_open("k")
+    clock[0] += 599
+    assert not CircuitBreaker.allow("k")
+
+
+def test_release_returns_unused_probe(clock):
+    _trip("k")
+    clock[0] += 601
+    assert CircuitBreaker.allow("k")
+    CircuitBreaker.release("k")
+    assert CircuitBreaker.allow("k")
+
+
+def test_release_does_not_close_a_genuinely_open_breaker(clock):
+    _trip("k")
+    CircuitBreaker.release("k")
+    assert CircuitBreaker.is_open("k")
+
+
+def test_allow_all_releases_probe_when_a_later_key_refuses(clock):
+    _trip(CircuitBreaker.GPT5)
+    _trip("k")
+    clock[0] += 601
+    CircuitBreaker.record_result("k", success=False)  # Key re-opens; GPT5 stays half-open
+    assert not CircuitBreaker.allow_all(CircuitBreaker.GPT5, "k")
+    # The GPT5 probe slot was handed back, so another caller can take it
+    assert CircuitBreaker.allow(CircuitBreaker.GPT5)
+
+
+def test_allow_all_admits_when_all_closed(clock):
+    assert CircuitBreaker.allow_all(CircuitBreaker.GPT5, "k")
+
+
+# === Rate-limit headers ===
+
+@pytest.mark.parametrize("value,expected", [
+    ("6m0s", 360.0),
+    ("1.5s", 1.5),
+    ("20ms", 0.02),
+    ("1h2m3s", 3723.0),
+    ("", 0.0),
+])
+def test_parse_reset(value, expected):
+    assert _parse_reset(value) == pytest.approx(expected)
+
+
+def test_retry_after_header_precedence():
+    assert _retry_after_from_headers({"retry-after-ms": "1500", "retry-after": "9"}) == 1.5
+    assert _retry_after_from_headers({"retry-after": "4"}) == 4.0
+    assert _retry_after_from_headers({
+        "x-ratelimit-reset-requests": "2s",
+        "x-ratelimit-reset-tokens": "6m0s",
+    }) == 360.0
+    assert _retry_after_from_headers(None) == 0.0
+
+
+def test_retry_after_http_date_falls_back_to_reset_headers():
+    headers = {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT", "x-ratelimit-reset-tokens": "3s"}
+    assert _retry_after_from_headers(headers) == 3.0
+
+
+def _sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(llm_client.time, "sleep", slept.append)
+    return slept
+
+
+def test_tracker_pauses_after_429(monkeypatch):
+    slept = _sleeps(monkeypatch)
+    tracker = RateLimitTracker()
+    tracker.update(429, {"retry-after": "5"})
+    tracker.wait_if_throttled()
+    assert len(slept) == 1 and 4.0 < slept[0] <= 5.0
+
+
+def test_tracker_pauses_when_remaining_below_headroom(monkeypatch):
+    slept = _sleeps(monkeypatch)
+    tracker = RateLimitTracker(headroom=0.1)
+    tracker.update(200, {
+        "x-ratelimit-limit-tokens": "1000",
+        "x-ratelimit-remaining-tokens": "50",
+        "x-ratelimit-reset-tokens": "2s",
+    })
+    tracker.wait_if_throttled()
+    assert len(slept) == 1 and 1.0 < slept[0] <= 2.0
+
+
+def test_tracker_ignores_healthy_headroom_and_caps_pause(monkeypatch):
+    slept = _sleeps(monkeypatch)
+    tracker = RateLimitTracker(headroom=0.1, max_pause=3.0)
+    tracker.update(200, {
+        "x-ratelimit-limit-requests": "100",
+        "x-ratelimit-remaining-requests": "90",
+        "x-ratelimit-reset-requests": "1m",
+    })
+    tracker.wait_if_throttled()
+    assert slept == []
+    tracker.update(429, {"retry-after": "600"})
+    tracker.wait_if_throttled()
+    assert len(slept) == 1 and slept[0] <= 3.0
+
+
+# === Persisted Responses capability ===
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("PERSISTENT_DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("DISCOVERY_RESPONSES_PROBE_TTL", "86400")
+    return tmp_path
+
+
+def test_capability_round_trip_is_atomic_and_keyed(data_dir):
+    save_persisted_capability("sk-one", True)
+    assert load_persisted_capability("sk-one") is True
+    assert load_persisted_capability("sk-two") is None
+    # Written via rename: no temp files left behind
+    assert [p.name for p in data_dir.iterdir()] == ["responses_capability.json"]
+
+
+def test_capability_expires(data_dir, monkeypatch):
+    save_persisted_capability("sk-one", True)
+    real_time = time.time
+    monkeypatch.setattr(llm_client.time, "time", lambda: real_time() + 86401)
+    assert load_persisted_capability("sk-one") is None
+
+
+def test_negative_capability_uses_shorter_ttl(data_dir, monkeypatch):
+    save_persisted_capability("sk-one", False)
+    assert load_persisted_capability("sk-one") is False
+    real_time = time.time
+    monkeypatch.setattr(llm_client.time, "time",
+                        lambda: real_time() + llm_client._CAPABILITY_NEGATIVE_TTL + 1)
+    assert load_persisted_capability("sk-one") is None
+
+
+def test_capability_cache_disabled_with_zero_ttl(data_dir, monkeypatch):
+    monkeypatch.setenv("DISCOVERY_RESPONSES_PROBE_TTL", "0")
+    save_persisted_capability("sk-one", True)
+    assert not os.path.exists(data_dir / "responses_capability.json")
+    assert load_persisted_capability("sk-one") is None